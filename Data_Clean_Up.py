@@ -1,11 +1,38 @@
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, 
-                             QHBoxLayout, QLabel, QFileDialog, QTextEdit, QGridLayout)
-from PyQt5.QtCore import Qt
+                             QLabel, QFileDialog, QTextEdit, QGridLayout, QProgressBar)
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 import sys
-import os
-import pandas as pd
-from datetime import datetime
-import shutil
+from Gene_Tools_Core import run_cleanup, warm_up_imports
+from Gene_Tools_Progress import ProgressBatcher, detail_log_path
+
+class CleanupWorkerThread(QThread):
+    # Stage messages and problems, sent in batches at a bounded rate
+    update_signal = pyqtSignal(str)
+    # done, total, counters text
+    progress_signal = pyqtSignal(int, int, str)
+
+    def __init__(self, uploaded_folder, sorted_folder, output_folder):
+        QThread.__init__(self)
+        self.uploaded_folder = uploaded_folder
+        self.sorted_folder = sorted_folder
+        self.output_folder = output_folder
+        self.detail_path = detail_log_path('cleanup')
+        self.reporter = ProgressBatcher(self.send_batch, self.detail_path)
+
+    def send_batch(self, lines, done, total, counters):
+        if lines:
+            self.update_signal.emit('\n'.join(lines))
+        self.progress_signal.emit(done, total, counters)
+
+    def run(self):
+        self.reporter.log(f"Full details: {self.detail_path}")
+        try:
+            run_cleanup(self.uploaded_folder, self.sorted_folder, self.output_folder,
+                        log=self.reporter.log, progress=self.reporter.progress)
+        except Exception as e:
+            self.reporter.log(f"Error during cleanup: {e}")
+        finally:
+            self.reporter.close()
 
 class CleanupGUI(QWidget):
     def __init__(self):
@@ -59,12 +86,19 @@ class CleanupGUI(QWidget):
         self.run_button = QPushButton('Run Cleanup')
         self.run_button.clicked.connect(self.run_cleanup)
         
+        # Progress of the folder moves, one line per folder only goes to the detail file
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.counters_label = QLabel('')
+        
         # Log area
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
         
         layout.addLayout(grid_layout)
         layout.addWidget(self.run_button)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.counters_label)
         layout.addWidget(self.log_area)
         
         self.setLayout(layout)
@@ -88,70 +122,23 @@ class CleanupGUI(QWidget):
             self.log_area.append("Please select all folders before running.")
             return
         
-        self.log_area.append("Starting cleanup process...")
-        
-        excel_output_path = os.path.join(output_folder, f"{datetime.now().strftime('%Y-%m')} Project_Completion_Record.xlsx")
-        cleanup_record_path = os.path.join(output_folder, f"{datetime.now().strftime('%Y-%m-%d')} Data Clean Up Record.xlsx")
-        
-        completed_projects = self.create_project_completion_excel(uploaded_folder, excel_output_path)
-        self.cleanup_sorted_sequencing(sorted_folder, output_folder, completed_projects, cleanup_record_path)
-        
-        self.log_area.append("Cleanup process completed.")
-    
-    def create_project_completion_excel(self, folder, excel_path):
-        self.log_area.append("Creating project completion Excel sheet...")
-        data = []
-        for file in os.listdir(folder):
-            if file.endswith('.zip'):
-                file_path = os.path.join(folder, file)
-                date_created = datetime.fromtimestamp(os.path.getctime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
-                data.append({'File Name': file, 'Date Created': date_created})
-        df = pd.DataFrame(data)
-        df['Work Number'] = df['File Name'].str[:9]
-        df.to_excel(excel_path, index=False)
-        self.log_area.append(f"Excel sheet created at: {excel_path}")
-        return df
-    
-    def cleanup_sorted_sequencing(self, sorted_folder, output_folder, completed_projects, cleanup_record_path):
-        self.log_area.append("Performing cleanup operation...")
-        moved_folders = []
-        
-        for folder in os.listdir(sorted_folder):
-            folder_path = os.path.join(sorted_folder, folder)
-            if os.path.isdir(folder_path):
-                work_number = folder[:9]  # Assuming the first 9 characters of the folder name are the work number
-                if work_number in completed_projects['Work Number'].values:
-                    destination_path = os.path.join(output_folder, folder)
-                    shutil.move(folder_path, destination_path)
-                    moved_folders.append({
-                        'Folder Name': folder,
-                        'Original Path': folder_path,
-                        'New Path': destination_path,
-                        'Date Moved': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                    self.log_area.append(f"Moved folder: {folder} to {destination_path}")
-        
-        self.create_cleanup_record(cleanup_record_path, moved_folders)
+        # Runs on a worker thread so the window stays responsive during the moves
+        self.cleanup_worker = CleanupWorkerThread(uploaded_folder, sorted_folder, output_folder)
+        self.cleanup_worker.update_signal.connect(self.log_area.append)
+        self.cleanup_worker.progress_signal.connect(self.update_progress)
+        self.cleanup_worker.finished.connect(lambda: self.run_button.setEnabled(True))
+        self.cleanup_worker.start()
+        self.run_button.setEnabled(False)
     
-    def create_cleanup_record(self, cleanup_record_path, moved_folders):
-        self.log_area.append("Creating cleanup record...")
-        df = pd.DataFrame(moved_folders)
-        
-        with pd.ExcelWriter(cleanup_record_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Moved Folders', index=False)
-            
-            # Add a summary sheet
-            summary_data = {
-                'Date': [datetime.now().strftime('%Y-%m-%d')],
-                'Total Folders Moved': [len(moved_folders)]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        self.log_area.append(f"Cleanup record created at: {cleanup_record_path}")
+    def update_progress(self, done, total, counters):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.counters_label.setText(counters)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     ex = CleanupGUI()
     ex.show()
+    # pandas and openpyxl load in the background once the window is drawn
+    QTimer.singleShot(0, warm_up_imports)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,167 +1,70 @@
 import os
-import shutil
-import pandas as pd
-from datetime import date
-from zipfile import ZipFile
-import zipfile
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QTextEdit, QFileDialog, QTabWidget
-from PyQt5.QtCore import QThread, pyqtSignal
-
-class RenameWorkerThread(QThread):
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QTextEdit, QFileDialog, QTabWidget, QSpinBox, QComboBox, QProgressBar
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from Gene_Tools_Core import (COMPRESSION_PRESETS, DEFAULT_COMPRESSION_PRESET, DEFAULT_ZIP_WORKERS, rename_folders, unzip_files,
+                             warm_up_imports, zip_folders)
+from Gene_Tools_Progress import ProgressBatcher, detail_log_path
+
+class BatchedWorkerThread(QThread):
+    # Stage messages and problems, sent in batches at a bounded rate
     update_signal = pyqtSignal(str)
-    
-    def __init__(self, main_folder, excel_path):
-        QThread.__init__(self)
-        self.main_folder = main_folder
-        self.excel_path = excel_path
+    # done, total, counters text
+    progress_signal = pyqtSignal(int, int, str)
 
-    def run(self):
-        self.process_folders()
-
-    def process_folders(self):
-        # Function to extract work number from folder name
-        def extract_work_number(folder_name):
-            return folder_name[:9]
+    def __init__(self, operation):
+        QThread.__init__(self)
+        self.detail_path = detail_log_path(operation)
+        self.reporter = ProgressBatcher(self.send_batch, self.detail_path)
 
-        # Function to get today's date in the format YYYY-MM-DD
-        def get_today_date():
-            return date.today().strftime("%Y-%m-%d")
+    def send_batch(self, lines, done, total, counters):
+        if lines:
+            self.update_signal.emit('\n'.join(lines))
+        self.progress_signal.emit(done, total, counters)
 
-        # Read the reference Excel file
+    def run(self):
+        self.reporter.log(f"Full details: {self.detail_path}")
         try:
-            ref_df = pd.read_excel(self.excel_path)
-        except FileNotFoundError:
-            self.update_signal.emit(f"Error: Excel file not found at {self.excel_path}")
-            return
-
-        # Print column names for debugging
-        self.update_signal.emit(f"Columns in the Excel file: {ref_df.columns.tolist()}")
-
-        # Strip whitespace from column names
-        ref_df.columns = ref_df.columns.str.strip()
+            self.work()
+        finally:
+            self.reporter.close()
 
-        # Check if required columns exist
-        required_columns = ['Work Number', 'BBID', 'Vector']
-        missing_columns = [col for col in required_columns if col not in ref_df.columns]
-        if missing_columns:
-            self.update_signal.emit(f"Error: The following required columns are missing from the Excel file: {', '.join(missing_columns)}")
-            return
-
-        # Convert the Work Number column to string type
-        ref_df['Work Number'] = ref_df['Work Number'].astype(str)
-
-        # Check if the main folder exists
-        if not os.path.exists(self.main_folder):
-            self.update_signal.emit(f"Error: The main folder does not exist at {self.main_folder}")
-            return
+class RenameWorkerThread(BatchedWorkerThread):
+    def __init__(self, main_folder, excel_path):
+        BatchedWorkerThread.__init__(self, 'rename')
+        self.main_folder = main_folder
+        self.excel_path = excel_path
 
-        # Iterate through all subfolders in the main folder
-        for folder_name in os.listdir(self.main_folder):
-            folder_path = os.path.join(self.main_folder, folder_name)
-           
-            # Check if it's a directory
-            if os.path.isdir(folder_path):
-                # Extract work number from the folder name
-                work_number = extract_work_number(folder_name)
-               
-                # Find matching row in the reference dataframe
-                matching_row = ref_df[ref_df['Work Number'] == work_number]
-               
-                if not matching_row.empty:
-                    bbid = matching_row['BBID'].values[0]
-                    vector = matching_row['Vector'].values[0]
-                   
-                    # Create new folder name
-                    new_folder_name = f"{work_number}.{bbid} in {vector} {get_today_date()}"
-                   
-                    # Full path for the new folder name
-                    new_folder_path = os.path.join(self.main_folder, new_folder_name)
-                   
-                    # Rename the folder
-                    try:
-                        os.rename(folder_path, new_folder_path)
-                        self.update_signal.emit(f"Renamed: {folder_name} -> {new_folder_name}")
-                    except PermissionError:
-                        self.update_signal.emit(f"Error: Permission denied when trying to rename {folder_name}")
-                    except FileExistsError:
-                        self.update_signal.emit(f"Error: A folder with the name {new_folder_name} already exists")
-                else:
-                    self.update_signal.emit(f"No matching work number found for: {work_number}")
+    def work(self):
+        self.process_folders()
 
-        self.update_signal.emit("Folder renaming completed.")
+    def process_folders(self):
+        rename_folders(self.main_folder, self.excel_path, log=self.reporter.log, progress=self.reporter.progress)
 
-class ZipWorkerThread(QThread):
-    update_signal = pyqtSignal(str)
-    
-    def __init__(self, folder_directory):
-        QThread.__init__(self)
+class ZipWorkerThread(BatchedWorkerThread):
+    def __init__(self, folder_directory, max_workers=DEFAULT_ZIP_WORKERS, compression_policy=None):
+        BatchedWorkerThread.__init__(self, 'zip')
         self.folder_directory = folder_directory
+        self.max_workers = max(1, max_workers)
+        self.compression_policy = compression_policy or COMPRESSION_PRESETS[DEFAULT_COMPRESSION_PRESET]
 
-    def run(self):
+    def work(self):
         self.zip_folders()
 
     def zip_folders(self):
-        def zip_folder(folder_path, zip_name):
-            with ZipFile(zip_name, 'w') as zipf:
-                for root, _, files in os.walk(folder_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, start=folder_path)
-                        zipf.write(file_path, arcname)
-
-        for folder_name in os.listdir(self.folder_directory):
-            folder_path = os.path.join(self.folder_directory, folder_name)
-           
-            if os.path.isdir(folder_path):
-                zip_name = os.path.join(self.folder_directory, f"{folder_name}.zip")
-               
-                try:
-                    zip_folder(folder_path, zip_name)
-                    self.update_signal.emit(f"Zipped '{folder_name}' to '{zip_name}'")
-                except Exception as e:
-                    self.update_signal.emit(f"Error zipping '{folder_name}': {e}")
-                    continue
-               
-                try:
-                    shutil.rmtree(folder_path)
-                    self.update_signal.emit(f"Removed original folder '{folder_name}'")
-                except Exception as e:
-                    self.update_signal.emit(f"Error removing folder '{folder_name}': {e}")
+        zip_folders(self.folder_directory, self.max_workers, self.compression_policy,
+                    log=self.reporter.log, progress=self.reporter.progress)
 
-        self.update_signal.emit("Zipping complete.")
-
-class UnzipWorkerThread(QThread):
-    update_signal = pyqtSignal(str)
-    
-    def __init__(self, directory):
-        QThread.__init__(self)
+class UnzipWorkerThread(BatchedWorkerThread):
+    def __init__(self, directory, max_workers=DEFAULT_ZIP_WORKERS):
+        BatchedWorkerThread.__init__(self, 'unzip')
         self.directory = directory
+        self.max_workers = max(1, max_workers)
 
-    def run(self):
+    def work(self):
         self.unzip_files()
 
     def unzip_files(self):
-        for filename in os.listdir(self.directory):
-            if filename.endswith('.zip'):
-                zip_file = os.path.join(self.directory, filename)
-                folder_name = os.path.splitext(os.path.basename(zip_file))[0]
-                extract_folder = os.path.join(self.directory, folder_name)
-                os.makedirs(extract_folder, exist_ok=True)
-                
-                with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                    zip_ref.extractall(extract_folder)
-                
-                contents = os.listdir(extract_folder)
-                if len(contents) == 1 and os.path.isdir(os.path.join(extract_folder, contents[0])):
-                    inner_folder = os.path.join(extract_folder, contents[0])
-                    for item in os.listdir(inner_folder):
-                        shutil.move(os.path.join(inner_folder, item), extract_folder)
-                    os.rmdir(inner_folder)
-                
-                os.remove(zip_file)
-                self.update_signal.emit(f"Extracted '{filename}' to '{extract_folder}' and deleted '{filename}'.")
-
-        self.update_signal.emit("Unzipping complete.")
+        unzip_files(self.directory, self.max_workers, log=self.reporter.log, progress=self.reporter.progress)
 
 class App(QWidget):
     def __init__(self):
@@ -218,6 +121,22 @@ class App(QWidget):
         zip_folder_layout.addWidget(QPushButton('Browse', clicked=lambda: self.browse_folder(self.zip_folder_input)))
         zip_layout.addLayout(zip_folder_layout)
         
+        zip_workers_layout = QHBoxLayout()
+        zip_workers_layout.addWidget(QLabel('Archives at once:'))
+        self.zip_workers_input = QSpinBox()
+        self.zip_workers_input.setRange(1, os.cpu_count() or 1)
+        self.zip_workers_input.setValue(DEFAULT_ZIP_WORKERS)
+        zip_workers_layout.addWidget(self.zip_workers_input)
+        zip_layout.addLayout(zip_workers_layout)
+        
+        zip_compression_layout = QHBoxLayout()
+        zip_compression_layout.addWidget(QLabel('Compression:'))
+        self.zip_compression_input = QComboBox()
+        self.zip_compression_input.addItems(list(COMPRESSION_PRESETS))
+        self.zip_compression_input.setCurrentText(DEFAULT_COMPRESSION_PRESET)
+        zip_compression_layout.addWidget(self.zip_compression_input)
+        zip_layout.addLayout(zip_compression_layout)
+        
         self.zip_button = QPushButton('Zip Folders', clicked=self.run_zip_script)
         zip_layout.addWidget(self.zip_button)
         
@@ -233,11 +152,26 @@ class App(QWidget):
         unzip_folder_layout.addWidget(QPushButton('Browse', clicked=lambda: self.browse_folder(self.unzip_folder_input)))
         unzip_layout.addLayout(unzip_folder_layout)
         
+        unzip_workers_layout = QHBoxLayout()
+        unzip_workers_layout.addWidget(QLabel('Archives at once:'))
+        self.unzip_workers_input = QSpinBox()
+        self.unzip_workers_input.setRange(1, os.cpu_count() or 1)
+        self.unzip_workers_input.setValue(DEFAULT_ZIP_WORKERS)
+        unzip_workers_layout.addWidget(self.unzip_workers_input)
+        unzip_layout.addLayout(unzip_workers_layout)
+        
         self.unzip_button = QPushButton('Unzip Folders', clicked=self.run_unzip_script)
         unzip_layout.addWidget(self.unzip_button)
         
         self.unzip_tab.setLayout(unzip_layout)
         
+        # Progress of the running operation, one line per item only goes to the detail file
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.counters_label = QLabel('')
+        layout.addWidget(self.counters_label)
+        
         # Log output
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
@@ -266,6 +200,8 @@ class App(QWidget):
         
         self.rename_worker = RenameWorkerThread(main_folder, excel_file)
         self.rename_worker.update_signal.connect(self.update_log)
+        self.rename_worker.progress_signal.connect(self.update_progress)
+        self.rename_worker.finished.connect(lambda: self.rename_button.setEnabled(True))
         self.rename_worker.start()
         self.rename_button.setEnabled(False)
         
@@ -276,8 +212,11 @@ class App(QWidget):
             self.log_output.append("Please select a folder to zip.")
             return
         
-        self.zip_worker = ZipWorkerThread(folder_directory)
+        compression_policy = COMPRESSION_PRESETS[self.zip_compression_input.currentText()]
+        self.zip_worker = ZipWorkerThread(folder_directory, self.zip_workers_input.value(), compression_policy)
         self.zip_worker.update_signal.connect(self.update_log)
+        self.zip_worker.progress_signal.connect(self.update_progress)
+        self.zip_worker.finished.connect(lambda: self.zip_button.setEnabled(True))
         self.zip_worker.start()
         self.zip_button.setEnabled(False)
         
@@ -288,19 +227,24 @@ class App(QWidget):
             self.log_output.append("Please select a folder to unzip.")
             return
         
-        self.unzip_worker = UnzipWorkerThread(directory)
+        self.unzip_worker = UnzipWorkerThread(directory, self.unzip_workers_input.value())
         self.unzip_worker.update_signal.connect(self.update_log)
+        self.unzip_worker.progress_signal.connect(self.update_progress)
+        self.unzip_worker.finished.connect(lambda: self.unzip_button.setEnabled(True))
         self.unzip_worker.start()
         self.unzip_button.setEnabled(False)
         
     def update_log(self, message):
         self.log_output.append(message)
-        if message.endswith("completed."):
-            self.rename_button.setEnabled(True)
-            self.zip_button.setEnabled(True)
-            self.unzip_button.setEnabled(True)
+
+    def update_progress(self, done, total, counters):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.counters_label.setText(counters)
 
 if __name__ == '__main__':
     app = QApplication([])
     ex = App()
+    # pandas and openpyxl load in the background once the window is drawn
+    QTimer.singleShot(0, warm_up_imports)
     app.exec_()
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Run the gene synthesis tools without a GUI.
+
+Each tab of the desktop tools is a subcommand working on Gene_Tools_Core:
+
+    python Gene_Tools_CLI.py organize SOURCE_DIR SORTED_DIR
+    python Gene_Tools_CLI.py distribute SORTED_DIR [--mode reflink]
+    python Gene_Tools_CLI.py log SOURCE_DIR LOG_DIR [--workers 4] [--incremental] [--sidecar csv]
+    python Gene_Tools_CLI.py rename MAIN_FOLDER REFERENCE_XLSX
+    python Gene_Tools_CLI.py zip FOLDER [--preset Balanced]
+    python Gene_Tools_CLI.py unzip FOLDER
+    python Gene_Tools_CLI.py cleanup UPLOADED_DIR SORTED_DIR OUTPUT_DIR [--sidecar parquet]
+    python Gene_Tools_CLI.py watch SOURCE_DIR SORTED_DIR
+    python Gene_Tools_CLI.py catalog [--job-id J] [--work-number W] [--state S] [--forget DIR]
+
+`batch FILE` runs one of these command lines per line of FILE (blank lines
+and lines starting with # are ignored) in a single process, so the job log
+and reference indexes are loaded once for the whole batch. The exit status
+is 1 when any command failed.
+
+--trace FILE (before the subcommand) appends every timed stage and file to
+FILE as JSON lines, --summary prints the slowest stages at the end.
+"""
+import os
+import sys
+import shlex
+import argparse
+import Gene_Tools_Core as core
+import Gene_Tools_Catalog
+import Gene_Tools_Trace
+from Job_Log_Index import JOB_LOG_PATH
+from Sequencing_Watcher import DEFAULT_INTERVAL, DEFAULT_SETTLE_SECONDS, main as watch_main
+
+
+def run_organize(args):
+    success = core.organize_files(args.source_dir, args.destination_dir, args.excel_path, args.workers)
+    print("Files organized successfully." if success else "Some files could not be organized.")
+    return success
+
+def run_distribute(args):
+    success = core.distribute_files(args.destination_dir, args.mode, args.reference_dir)
+    print("Files distributed successfully." if success else "Some reference files could not be distributed.")
+    return success
+
+def run_log(args):
+    success, message = core.generate_sequencing_log(args.source_dir, args.log_dir, args.excel_path,
+                                                    args.workers, args.incremental, args.sidecar)
+    print(message)
+    return success
+
+def run_rename(args):
+    return core.rename_folders(args.main_folder, args.excel_path)
+
+def run_zip(args):
+    return core.zip_folders(args.folder, args.workers, core.COMPRESSION_PRESETS[args.preset])
+
+def run_unzip(args):
+    return core.unzip_files(args.folder, args.workers)
+
+def run_cleanup(args):
+    for folder in (args.uploaded_dir, args.sorted_dir, args.output_dir):
+        if not os.path.isdir(folder):
+            print(f"Folder does not exist: {folder}")
+            return False
+    return core.run_cleanup(args.uploaded_dir, args.sorted_dir, args.output_dir, sidecars=args.sidecar)
+
+def run_watch(args):
+    watch_argv = [args.source_dir, args.destination_dir, '--excel-path', args.excel_path,
+                  '--interval', str(args.interval), '--settle', str(args.settle)]
+    watch_main(watch_argv + (['--events'] if args.events else []))
+    return True
+
+def run_catalog(args):
+    catalog = Gene_Tools_Catalog.get_catalog()
+    if args.forget:
+        catalog.forget(args.forget)
+        print(f"{args.forget} will be listed again on its next use.")
+        return True
+    entries = catalog.find(args.job_id, args.work_number, args.state, args.directory)
+    for entry in entries:
+        kind = 'folder' if entry.is_dir else 'file'
+        print(f"{entry.state or '-':<10} {kind:<6} {os.path.join(entry.directory, entry.name)}")
+    print(f"{len(entries)} catalog entries.")
+    return True
+
+def run_batch(args):
+    parser = build_parser()
+    failed = 0
+    with open(args.file, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    for line_number, line in enumerate(lines, 1):
+        if not line or line.startswith('#'):
+            continue
+        print(f"[{line_number}] {line}")
+        try:
+            command_args = parser.parse_args(shlex.split(line))
+            if command_args.command in ('batch', 'watch'):
+                print(f"Line {line_number}: '{command_args.command}' cannot run inside a batch")
+                ok = False
+            else:
+                ok = command_args.func(command_args)
+        except SystemExit:
+            # argparse already printed the usage error for this line
+            ok = False
+        except Exception as e:
+            print(f"Error on line {line_number}: {e}")
+            ok = False
+        if not ok:
+            failed += 1
+            if args.stop_on_error:
+                break
+    print(f"Batch finished, {failed} command(s) failed.")
+    return failed == 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Gene synthesis file tools without the GUI.")
+    parser.add_argument('--trace', metavar='FILE', help="Append a JSON line per timed stage and file to FILE")
+    parser.add_argument('--summary', action='store_true', help="Print the slowest stages when the run ends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    organize = subparsers.add_parser('organize', help="Sort sequencing files into job_id.plasmid.bbid folders")
+    organize.add_argument('source_dir', help="Sequencing files directory")
+    organize.add_argument('destination_dir', help="Sorted sequencing folder directory")
+    organize.add_argument('--excel-path', default=JOB_LOG_PATH, help="Job log workbook with the BBIDs")
+    organize.add_argument('--workers', type=int, default=core.DEFAULT_IO_WORKERS, help="Threads moving files")
+    organize.set_defaults(func=run_organize)
+
+    distribute = subparsers.add_parser('distribute', help="Deliver reference files into the sorted folders")
+    distribute.add_argument('destination_dir', help="Sorted sequencing folder directory")
+    distribute.add_argument('--mode', choices=core.DELIVERY_MODES, default=core.DEFAULT_DELIVERY_MODE)
+    distribute.add_argument('--reference-dir', default=core.REFERENCE_DIR, help="Folder holding the reference .txt files")
+    distribute.set_defaults(func=run_distribute)
+
+    log = subparsers.add_parser('log', help="Build today's sequencing log from plate files")
+    log.add_argument('source_dir', help="Plate files directory")
+    log.add_argument('log_dir', help="Log directory")
+    log.add_argument('--excel-path', default=JOB_LOG_PATH, help="Job log workbook with the BBIDs")
+    log.add_argument('--workers', type=int, default=core.DEFAULT_WORKERS, help="Worker processes parsing plates")
+    log.add_argument('--incremental', action='store_true', help="Only new or changed plates")
+    log.add_argument('--sidecar', action='append', choices=core.SIDECAR_FORMATS, default=[],
+                     help="Also write the log in this format next to the .xlsx (repeatable)")
+    log.set_defaults(func=run_log)
+
+    rename = subparsers.add_parser('rename', help="Rename project folders from the reference workbook")
+    rename.add_argument('main_folder', help="Folder holding the project folders")
+    rename.add_argument('excel_path', help="Reference workbook with Work Number, BBID and Vector")
+    rename.set_defaults(func=run_rename)
+
+    zip_command = subparsers.add_parser('zip', help="Zip every subfolder and remove it once verified")
+    zip_command.add_argument('folder', help="Folder holding the project folders")
+    zip_command.add_argument('--workers', type=int, default=core.DEFAULT_ZIP_WORKERS, help="Archives built at once")
+    zip_command.add_argument('--preset', choices=list(core.COMPRESSION_PRESETS), default=core.DEFAULT_COMPRESSION_PRESET)
+    zip_command.set_defaults(func=run_zip)
+
+    unzip = subparsers.add_parser('unzip', help="Extract every .zip and delete it once extracted")
+    unzip.add_argument('folder', help="Folder holding the archives")
+    unzip.add_argument('--workers', type=int, default=core.DEFAULT_ZIP_WORKERS, help="Archives extracted at once")
+    unzip.set_defaults(func=run_unzip)
+
+    cleanup = subparsers.add_parser('cleanup', help="Record completed zips and move their sorted folders")
+    cleanup.add_argument('uploaded_dir', help="Uploaded folder")
+    cleanup.add_argument('sorted_dir', help="Sorted sequencing folder")
+    cleanup.add_argument('output_dir', help="Output folder")
+    cleanup.add_argument('--sidecar', action='append', choices=core.SIDECAR_FORMATS, default=[],
+                         help="Also write the moved-folders record in this format (repeatable)")
+    cleanup.set_defaults(func=run_cleanup)
+
+    watch = subparsers.add_parser('watch', help="Sort sequencing files as they arrive (runs until stopped)")
+    watch.add_argument('source_dir', help="Sequencing files directory")
+    watch.add_argument('destination_dir', help="Sorted sequencing folder directory")
+    watch.add_argument('--excel-path', default=JOB_LOG_PATH, help="Job log workbook with the BBIDs")
+    watch.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="Seconds between folder snapshots")
+    watch.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS, help="Seconds a file must stay unchanged before it is moved")
+    watch.add_argument('--events', action='store_true', help="Also wake on file-system events (needs watchdog)")
+    watch.set_defaults(func=run_watch)
+
+    catalog = subparsers.add_parser('catalog', help="Look up files and folders in the local catalog")
+    catalog.add_argument('--job-id', help="Only entries of this Job ID")
+    catalog.add_argument('--work-number', help="Only entries of this work number")
+    catalog.add_argument('--state', choices=Gene_Tools_Catalog.STATES, help="Only entries in this state")
+    catalog.add_argument('--directory', help="Only entries directly in this folder")
+    catalog.add_argument('--forget', metavar='DIR', help="List DIR again on its next use instead of querying")
+    catalog.set_defaults(func=run_catalog)
+
+    batch = subparsers.add_parser('batch', help="Run one command per line of a file in a single process")
+    batch.add_argument('file', help="Text file with one command line per line")
+    batch.add_argument('--stop-on-error', action='store_true', help="Stop at the first failed command")
+    batch.set_defaults(func=run_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace or args.summary:
+        Gene_Tools_Trace.enable(args.trace)
+    try:
+        return 0 if args.func(args) else 1
+    finally:
+        if args.summary:
+            print(Gene_Tools_Trace.summary())
+        if args.trace or args.summary:
+            Gene_Tools_Trace.disable()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
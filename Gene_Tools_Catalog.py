@@ -0,0 +1,269 @@
+"""Local SQLite catalog of the sequencing files and project folders on the share.
+
+One row per file or folder the tools have seen: its directory and name, job
+ID, plasmid number, BBID, work number, size, mtime and lifecycle state
+(dropped, sorted, referenced, renamed, zipped, unzipped, uploaded, cleaned),
+indexed on job ID, work number and state.
+
+list_directory() answers from the catalog while the directory's mtime is the
+one recorded at its last listing, so an unchanged folder on the share costs a
+single stat instead of a full listing. Creating, deleting or renaming an entry
+changes the directory's mtime and the next call lists it again. The tools
+write their own moves and renames to the catalog as they make them, and the
+listing after such a run reconciles the catalog with whatever else changed
+the directory meanwhile (a sequencer writing into the drop folder). A listing
+taken within MTIME_TICK of the directory's mtime is not trusted, as a file
+added in the same tick of a share's coarse timestamps would not change it;
+settled_mtime() applies that rule, the reference index uses it too.
+`Gene_Tools_CLI.py catalog --forget DIR` forces a fresh listing.
+
+Size and mtime are those seen when the tools last touched an entry. Windows
+listings carry them for free; elsewhere they are filled in only by operations
+that stat the file anyway.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+from Job_Log_Index import CACHE_DIR
+
+# Catalog database, kept with the other local indexes
+CATALOG_PATH = os.path.join(CACHE_DIR, 'catalog.sqlite3')
+
+# Bump when the tables change, older catalogs are rebuilt from fresh listings
+SCHEMA_VERSION = 1
+
+STATES = ('dropped', 'sorted', 'referenced', 'renamed', 'zipped', 'unzipped', 'uploaded', 'cleaned')
+
+COLUMNS = ('directory', 'name', 'is_dir', 'job_id', 'plasmid_number', 'bbid', 'work_number', 'size', 'mtime_ns', 'state')
+Entry = namedtuple('Entry', COLUMNS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    job_id TEXT,
+    plasmid_number TEXT,
+    bbid TEXT,
+    work_number TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    state TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (directory, name)
+);
+CREATE INDEX IF NOT EXISTS entries_job_id ON entries (job_id);
+CREATE INDEX IF NOT EXISTS entries_work_number ON entries (work_number);
+CREATE INDEX IF NOT EXISTS entries_state ON entries (state);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    listed REAL NOT NULL
+);
+"""
+
+# Coarsest directory mtime resolution of the shares (FAT and some SMB servers count in 2 s steps)
+MTIME_TICK = 2.0
+
+# SQLite's default limit on parameters in one statement is 999
+_CHUNK = 500
+
+
+# Function to get the directory mtime a listing taken at listed_at can be cached under, None when it cannot
+def settled_mtime(dir_mtime_ns, listed_at):
+    # Changed too recently, a file added in the same tick would leave the mtime as it is
+    return dir_mtime_ns if listed_at - dir_mtime_ns / 1e9 > MTIME_TICK else None
+
+
+class Catalog:
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.connection = self._connect(path)
+        except (OSError, sqlite3.Error) as e:
+            # A broken or locked catalog must not stop the tools, they just list every time
+            print(f"Could not open catalog {path}, using a temporary one: {e}")
+            self.path = ':memory:'
+            self.connection = self._connect(':memory:')
+
+    @staticmethod
+    def _connect(path):
+        connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        if connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            connection.executescript('DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS directories;')
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        if path != ':memory:':
+            # Commits only fsync at checkpoints, the catalog can always be rebuilt from the share
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+        connection.executescript(SCHEMA)
+        connection.commit()
+        return connection
+
+    def list_directory(self, directory, describe=None):
+        """Return the Entry rows of directory, listing it again only when its mtime changed.
+
+        describe(name, is_dir) returns a dict of column values for entries seen for
+        the first time.
+        """
+        directory = os.path.abspath(directory)
+        dir_mtime = os.stat(directory).st_mtime_ns
+        with self.lock:
+            row = self.connection.execute('SELECT mtime_ns FROM directories WHERE path = ?', (directory,)).fetchone()
+            if row is not None and row[0] == dir_mtime:
+                return self._entries(directory)
+
+        listing = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                size = mtime_ns = None
+                if os.name == 'nt' and not entry.is_dir():
+                    # Windows directory listings already carry the stat
+                    stat = entry.stat()
+                    size, mtime_ns = stat.st_size, stat.st_mtime_ns
+                listing[entry.name] = (entry.is_dir(), size, mtime_ns)
+
+        now = time.time()
+        with self.lock, self.connection:
+            known = dict(self.connection.execute('SELECT name, is_dir FROM entries WHERE directory = ?', (directory,)))
+            gone = [name for name, is_dir in known.items() if name not in listing or bool(is_dir) != listing[name][0]]
+            self._delete(directory, gone)
+            for name, (is_dir, size, mtime_ns) in listing.items():
+                if name in known and name not in gone:
+                    if size is not None:
+                        self.connection.execute('UPDATE entries SET size = ?, mtime_ns = ? WHERE directory = ? AND name = ?',
+                                                (size, mtime_ns, directory, name))
+                    continue
+                fields = describe(name, is_dir) if describe else {}
+                fields.update(size=size, mtime_ns=mtime_ns)
+                self._upsert(directory, name, is_dir, fields, now)
+            if settled_mtime(dir_mtime, now) is not None:
+                self.connection.execute('INSERT OR REPLACE INTO directories (path, mtime_ns, listed) VALUES (?, ?, ?)',
+                                        (directory, dir_mtime, now))
+            else:
+                self.connection.execute('DELETE FROM directories WHERE path = ?', (directory,))
+            return self._entries(directory)
+
+    def _entries(self, directory):
+        cursor = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM entries WHERE directory = ? ORDER BY name",
+                                         (directory,))
+        return [Entry(*row[:2], bool(row[2]), *row[3:]) for row in cursor]
+
+    def _delete(self, directory, names):
+        for name in names:
+            self.connection.execute('DELETE FROM entries WHERE directory = ? AND name = ?', (directory, name))
+            self._move_tree(os.path.join(directory, name), None)
+
+    def _move_tree(self, path, new_path):
+        """Move (or with new_path None, drop) the rows of everything below the folder path."""
+        # A range on the primary key rather than LIKE, so the lookup stays indexed
+        low, high = path + os.sep, path + chr(ord(os.sep) + 1)
+        condition = 'directory = ? OR (directory >= ? AND directory < ?)'
+        if new_path is None:
+            self.connection.execute(f'DELETE FROM entries WHERE {condition}', (path, low, high))
+            self.connection.execute(f'DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)', (path, low, high))
+            return
+        self.connection.execute(f'UPDATE entries SET directory = ? || substr(directory, ?) WHERE {condition}',
+                                (new_path, len(path) + 1, path, low, high))
+        # Listings of moved folders are not known to be current at their new place
+        self.connection.execute(f'DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)', (path, low, high))
+
+    def _upsert(self, directory, name, is_dir, fields, now):
+        columns = [column for column in COLUMNS[3:] if column in fields]
+        assignments = ''.join(f', {column} = excluded.{column}' for column in columns)
+        self.connection.execute(
+            f"INSERT INTO entries (directory, name, is_dir, updated{''.join(', ' + c for c in columns)}) "
+            f"VALUES (?, ?, ?, ?{', ?' * len(columns)}) "
+            f"ON CONFLICT (directory, name) DO UPDATE SET is_dir = excluded.is_dir, updated = excluded.updated{assignments}",
+            (directory, name, int(is_dir), now, *(fields[column] for column in columns)))
+
+    def record(self, directory, name, is_dir, **fields):
+        """Add or update one entry, only the given columns are changed on an existing row."""
+        with self.lock, self.connection:
+            self._upsert(os.path.abspath(directory), name, is_dir, fields, time.time())
+
+    def remove(self, directory, names):
+        with self.lock, self.connection:
+            self._delete(os.path.abspath(directory), names)
+
+    def move(self, directory, name, new_directory, new_name=None, **fields):
+        """Move an entry's row, keeping its columns unless new values are given."""
+        self.move_many(directory, [(name, new_name or name)], new_directory, **fields)
+
+    def move_many(self, directory, names, new_directory, **fields):
+        """Move several rows in one transaction, names holds (name, new name) pairs."""
+        directory, new_directory = os.path.abspath(directory), os.path.abspath(new_directory)
+        now = time.time()
+        with self.lock, self.connection:
+            for name, new_name in names:
+                row = self.connection.execute(f"SELECT {', '.join(COLUMNS[2:])} FROM entries WHERE directory = ? AND name = ?",
+                                              (directory, name)).fetchone()
+                values = dict(zip(COLUMNS[2:], row)) if row is not None else {'is_dir': False}
+                was_dir = bool(values['is_dir'])
+                values.update(fields)
+                is_dir = values.pop('is_dir')
+                self.connection.execute('DELETE FROM entries WHERE directory = ? AND name = ?', (directory, name))
+                # Rows inside a folder follow it, and are dropped when it became a file (zipped)
+                self._move_tree(os.path.join(directory, name), os.path.join(new_directory, new_name) if was_dir and is_dir else None)
+                self._upsert(new_directory, new_name, is_dir, values, now)
+
+    def set_state(self, directory, names, state, replace=True):
+        """Set the state of entries, with replace=False only of those that have none yet."""
+        directory = os.path.abspath(directory)
+        condition = '' if replace else ' AND state IS NULL'
+        with self.lock, self.connection:
+            self.connection.executemany(f'UPDATE entries SET state = ?, updated = ? WHERE directory = ? AND name = ?{condition}',
+                                        [(state, time.time(), directory, name) for name in names])
+
+    def forget(self, directory):
+        """Make the next list_directory() list the directory again."""
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM directories WHERE path = ?', (os.path.abspath(directory),))
+
+    def find(self, job_id=None, work_number=None, state=None, directory=None):
+        """Return the entries matching every given column."""
+        conditions, values = [], []
+        for column, value in (('job_id', job_id), ('work_number', work_number), ('state', state),
+                              ('directory', os.path.abspath(directory) if directory else None)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                values.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self.lock:
+            cursor = self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM entries {where} ORDER BY directory, name", values)
+            return [Entry(*row[:2], bool(row[2]), *row[3:]) for row in cursor]
+
+    def folders_with_work_numbers(self, directory, work_numbers):
+        """Return the folder entries of an already listed directory whose work number is in work_numbers."""
+        directory = os.path.abspath(directory)
+        work_numbers = list(work_numbers)
+        found = []
+        with self.lock:
+            for start in range(0, len(work_numbers), _CHUNK):
+                chunk = work_numbers[start:start + _CHUNK]
+                cursor = self.connection.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM entries WHERE directory = ? AND is_dir = 1 "
+                    f"AND work_number IN ({', '.join('?' * len(chunk))}) ORDER BY name", (directory, *chunk))
+                found.extend(Entry(*row[:2], bool(row[2]), *row[3:]) for row in cursor)
+        return sorted(found, key=lambda entry: entry.name)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+# One catalog per database path for the whole process
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path=None):
+    path = path or CATALOG_PATH
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = Catalog(path)
+        return _catalogs[path]
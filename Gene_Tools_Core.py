@@ -0,0 +1,1192 @@
+"""Core operations of the gene synthesis tools, with no GUI imports.
+
+Gene_file_organizer, Sequencing_Log_Generator, Gene_Report_Organizer and
+Data_Clean_Up are thin Tk/PyQt5 front ends over these functions, and
+Gene_Tools_CLI runs them unattended. Every operation reports progress
+through a `log` callable (print by default).
+
+pandas and openpyxl are imported by the functions that use them, so the
+front ends open their window first and call warm_up_imports() to load them
+in the background.
+
+Folders on the share are listed through the local catalog (Gene_Tools_Catalog),
+which every operation updates with the files and folders it moves. The bulk
+operations keep a journal (Gene_Tools_Journal) of their planned and finished
+items, and a run that was interrupted is resumed from it.
+"""
+import os
+import re
+import json
+import shutil
+import pickle
+import hashlib
+import time
+import zipfile
+from zipfile import ZipFile
+from datetime import date, datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, reflinks fall back to a plain copy
+    fcntl = None
+from Gene_Tools_Catalog import get_catalog, settled_mtime
+from Gene_Tools_Journal import Journal
+from Gene_Tools_Output import SIDECAR_FORMATS, TableWriter, iter_sheet_rows
+from Gene_Tools_Trace import detach as detach_tracing, enabled as tracing, span
+from Job_Log_Index import CACHE_DIR, JOB_LOG_PATH, MissingColumnsError, load_bbid_mapping, load_index_with_duplicates
+
+# Fixed location of the reference .txt files distributed into the sorted folders
+REFERENCE_DIR = r'Z:\Gene Synthesis\3.0 In-House Gene\3.6 QC\3.6.X Reference files'
+
+# Default number of threads moving and deleting files on the network share
+DEFAULT_IO_WORKERS = 8
+
+# Default number of worker processes for plate parsing
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Default number of archives built or extracted at the same time
+DEFAULT_ZIP_WORKERS = min(4, os.cpu_count() or 1)
+
+# Default number of folders moved at the same time during cleanup
+DEFAULT_MOVE_WORKERS = 8
+
+
+# Function to import the heavy libraries on a background thread while a window is already showing
+def warm_up_imports():
+    def load():
+        try:
+            import pandas
+            import openpyxl
+        except ImportError:
+            # Reported by the operation that needs them
+            pass
+    thread = threading.Thread(target=load, name='import-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+# Function to get the per-item reporter of an operation: progress(done, total, message, outcome) when given, else log
+def item_reporter(log, progress, total):
+    done = 0
+    def report(message, outcome='ok'):
+        nonlocal done
+        done += 1
+        if progress is None:
+            # log is None for operations whose items are only reported to a progress display
+            if log is not None:
+                log(message)
+        else:
+            progress(done, total, message, outcome)
+    return report
+
+# Function to check the cooperative cancel flag of an operation, a threading.Event or None when it cannot be stopped
+def cancelled(cancel):
+    return cancel is not None and cancel.is_set()
+
+
+# Function to get the catalog columns that can be read from a file or folder name
+def describe_entry(name, is_dir):
+    if is_dir:
+        # Sorted folders start with the Job ID, project folders with the work number
+        return {'job_id': name.split('.')[0], 'work_number': name[:9]}
+    if name.endswith('.zip'):
+        return {'work_number': name[:9]}
+    job_id, plasmid_number = extract_info(name)
+    return {'job_id': job_id, 'plasmid_number': plasmid_number, 'state': 'dropped' if job_id else None}
+
+
+# Script 1: Organize Sequencing Files
+
+# Function to extract Job ID and Plasmid Number from filename
+def extract_info(filename):
+    pattern = re.compile(r'(.+?)_(.+?)_(.+)')
+    match = pattern.match(filename)
+    if match:
+        plasmid_number = match.group(1)
+        job_id = match.group(2).strip('.')
+        return job_id, plasmid_number
+    return None, None
+
+# Function to get the job_id.plasmid.bbid folder a sequencing file is sorted into, or None
+def target_folder_name(filename, bbid_mapping):
+    job_id, plasmid_number = extract_info(filename)
+    if not (job_id and plasmid_number):
+        return None
+    # Get the corresponding BBID or set to empty string if unknown
+    bbid = bbid_mapping.get(job_id, '')
+    # Ensure no leading dots and extra dots in the folder name
+    return f'{job_id}.{plasmid_number}.{bbid}'.replace('..', '.')
+
+# Function to get the BBID for a given job ID, None when the job log is missing or unreadable
+def get_bbid_mapping(excel_path, log=print):
+    if not os.path.exists(excel_path):
+        log(f"Excel file does not exist: {excel_path}")
+        return None
+    try:
+        # Served from the local index cache unless the job log has changed
+        return load_bbid_mapping(excel_path)
+    except Exception as e:
+        log(f"Error reading Excel file: {e}")
+        return None
+
+def organize_files(source_dir, destination_dir, excel_path=JOB_LOG_PATH, max_workers=DEFAULT_IO_WORKERS, log=print, progress=None, cancel=None):
+    """Sort the sequencing files of source_dir into their folders, returns True when every file was handled."""
+    if not os.path.exists(source_dir):
+        log(f"Source directory does not exist: {source_dir}")
+        return False
+
+    catalog = get_catalog()
+
+    def make_plan():
+        # Classify every file in a single directory scan: .seq files are deleted, .ab1/.fasta files are moved
+        seq_files = []
+        sequencing_files = []
+        with span('organize.scan', source_dir):
+            entries = catalog.list_directory(source_dir, describe_entry)
+        for entry in entries:
+            if entry.is_dir:
+                continue
+            if entry.name.endswith('.seq'):
+                seq_files.append(entry.name)
+            elif entry.name.endswith('.ab1') or entry.name.endswith('.fasta'):
+                sequencing_files.append(entry.name)
+
+        # Get the BBID mapping from the Excel file
+        with span('organize.bbid_mapping', excel_path):
+            bbid_mapping = get_bbid_mapping(excel_path, log)
+        if bbid_mapping is None:
+            # Without the job log every folder would miss its BBID, so nothing is moved
+            return None
+
+        # Plan the deletes, and the moves into each file's target folder
+        plan = [['delete', filename] for filename in seq_files]
+        for filename in sequencing_files:
+            folder_name = target_folder_name(filename, bbid_mapping)
+            if folder_name:
+                plan.append(['move', filename, folder_name])
+        return plan
+
+    journal = Journal('organize', source_dir, destination_dir)
+    planned = journal.resume_or_plan(make_plan, log, 'files')
+    if planned is None:
+        return False
+    plan, done, pending, resumed = planned
+    if resumed:
+        log("Files added since the interruption are sorted by the next run.")
+
+    # Create each target folder once
+    failed_folders = set()
+    for folder_name in sorted({item[2] for _, item in pending if item[0] == 'move'}):
+        folder_path = os.path.join(destination_dir, folder_name)
+        with span('organize.makedirs', folder_name) as record:
+            try:
+                os.makedirs(folder_path, exist_ok=True)
+            except Exception as e:
+                record['outcome'] = type(e).__name__
+                log(f"Error creating folder {folder_path}: {e}")
+                failed_folders.add(folder_name)
+
+    def delete_file(index, filename):
+        if cancelled(cancel):
+            return None
+        file_path = os.path.join(source_dir, filename)
+        with span('organize.delete', file_path) as record:
+            try:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    # Deleted before the run was interrupted
+                    if not resumed:
+                        raise
+                journal.done(index)
+                return True
+            except Exception as e:
+                record['outcome'] = type(e).__name__
+                log(f"Error deleting file {file_path}: {e}")
+                return False
+
+    def move_file(index, filename, folder_name):
+        if cancelled(cancel):
+            return None
+        file_path = os.path.join(source_dir, filename)
+        destination_file = os.path.join(destination_dir, folder_name, filename)
+        with span('organize.move', file_path) as record:
+            try:
+                try:
+                    shutil.move(file_path, destination_file)
+                except FileNotFoundError:
+                    # Moved before the run was interrupted
+                    if not resumed or not os.path.exists(destination_file):
+                        raise
+                if tracing():
+                    record['bytes'] = os.path.getsize(destination_file)
+                journal.done(index)
+                return True
+            except Exception as e:
+                record['outcome'] = type(e).__name__
+                log(f"Error moving file {file_path} to {destination_file}: {e}")
+                return False
+
+    # Deletes and moves are independent round trips to the share, so several run at once
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for index, item in pending:
+            if item[0] == 'delete':
+                futures[executor.submit(delete_file, index, item[1])] = item
+            elif item[2] not in failed_folders:
+                futures[executor.submit(move_file, index, *item[1:])] = item
+        # Problems are logged by the workers, the progress display only gets the counts
+        report = item_reporter(None, progress, len(futures))
+        for future in as_completed(futures):
+            item = futures[future]
+            ok = future.result()
+            results.append((item, ok))
+            action = 'Deleted' if item[0] == 'delete' else 'Sorted'
+            report(f"{action} {item[1]}" if ok else f"Not {action.lower()}: {item[1]}",
+                   'ok' if ok else 'cancelled' if ok is None else 'error')
+    # A cancelled run is not resumed, the files it did not reach are picked up by the next scan
+    journal.finish()
+    if cancelled(cancel):
+        log(f"Cancelled after {sum(1 for _, ok in results if ok)} of {len(pending)} files.")
+
+    # Record the outcome in the catalog
+    catalog.remove(source_dir, [item[1] for item, ok in results if ok and item[0] == 'delete'])
+    moved = {}
+    for item, ok in results:
+        if ok and item[0] == 'move':
+            moved.setdefault(item[2], []).append(item[1])
+    for folder_name, filenames in moved.items():
+        catalog_sorted_files(catalog, source_dir, destination_dir, folder_name, filenames)
+    return not failed_folders and all(ok for _, ok in results)
+
+# Function to record sequencing files moved into their sorted folder in the catalog
+def catalog_sorted_files(catalog, source_dir, destination_dir, folder_name, filenames):
+    job_id, plasmid_number, bbid = (folder_name.split('.', 2) + ['', ''])[:3]
+    fields = {'job_id': job_id, 'plasmid_number': plasmid_number, 'bbid': bbid or None}
+    catalog.record(destination_dir, folder_name, True, work_number=folder_name[:9], **fields)
+    # A folder that already had its references keeps that state
+    catalog.set_state(destination_dir, [folder_name], 'sorted', replace=False)
+    catalog.move_many(source_dir, [(filename, filename) for filename in filenames],
+                      os.path.join(destination_dir, folder_name), state='sorted', **fields)
+
+
+# Script 2: Distribute Reference Files
+
+# How reference files are delivered: each mode falls back to the next one when it cannot be used
+DELIVERY_MODES = ('hardlink', 'reflink', 'copy')
+DEFAULT_DELIVERY_MODE = 'reflink'
+
+# Linux ioctl that shares the source blocks copy-on-write (btrfs, XFS)
+FICLONE = 0x40049409
+
+# Function to check if the destination already holds the same file
+def is_unchanged(source_file, destination_file):
+    try:
+        source_stat = os.stat(source_file)
+        destination_stat = os.stat(destination_file)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(source_stat, destination_stat):
+        return True
+    # Copies keep the source mtime, whole seconds allow for coarse network-share timestamps
+    return (source_stat.st_size == destination_stat.st_size
+            and int(source_stat.st_mtime) == int(destination_stat.st_mtime))
+
+# Function to clone a file copy-on-write, or let the kernel copy it with copy_file_range
+def reflink_file(source_file, destination_file):
+    if fcntl is None and not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        with open(source_file, 'rb') as source, open(destination_file, 'wb') as destination:
+            try:
+                fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+            except (OSError, AttributeError):
+                remaining = os.fstat(source.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(source.fileno(), destination.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+        shutil.copystat(source_file, destination_file)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+# Function to deliver one reference file, returns how it was delivered
+def deliver_file(source_file, destination_file, mode=DEFAULT_DELIVERY_MODE):
+    if is_unchanged(source_file, destination_file):
+        return 'skipped'
+    fallbacks = DELIVERY_MODES[DELIVERY_MODES.index(mode):]
+    if 'hardlink' in fallbacks:
+        try:
+            if os.path.exists(destination_file):
+                os.remove(destination_file)
+            os.link(source_file, destination_file)
+            return 'hardlink'
+        except OSError:
+            # Different volume or a share without hard links
+            pass
+    if 'reflink' in fallbacks and reflink_file(source_file, destination_file):
+        return 'reflink'
+    # copy2 keeps the mtime so the next run can skip the file
+    shutil.copy2(source_file, destination_file)
+    return 'copy'
+
+# Function to get the base name a reference file is matched on
+def reference_base_name(filename):
+    return filename.split('+')[0].split('.')[0]
+
+def load_reference_index(source_dir, log=print):
+    """Return {base name: [reference filenames]} for the .txt files in source_dir.
+
+    The index is pickled under CACHE_DIR. While the folder's mtime is unchanged it
+    is used as is; otherwise the folder is listed once and only the added and
+    removed names are applied to the cached index. A listing taken within the
+    folder's mtime tick is not trusted (see settled_mtime).
+    """
+    digest = hashlib.sha1(os.path.abspath(source_dir).encode('utf-8')).hexdigest()[:16]
+    cache_path = os.path.join(CACHE_DIR, f"references-{digest}.pkl")
+    dir_mtime = os.stat(source_dir).st_mtime_ns
+
+    try:
+        with open(cache_path, 'rb') as f:
+            index = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        index = {'mtime': None, 'filenames': set(), 'file_map': {}}
+    if index['mtime'] == dir_mtime:
+        return index['file_map']
+
+    with os.scandir(source_dir) as entries:
+        filenames = {entry.name for entry in entries if entry.name.endswith('.txt')}
+    listed_at = time.time()
+    file_map = index['file_map']
+    for filename in index['filenames'] - filenames:
+        base_name = reference_base_name(filename)
+        file_map[base_name].remove(filename)
+        if not file_map[base_name]:
+            del file_map[base_name]
+    for filename in sorted(filenames - index['filenames']):
+        file_map.setdefault(reference_base_name(filename), []).append(filename)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'mtime': settled_mtime(dir_mtime, listed_at), 'filenames': filenames, 'file_map': file_map}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log(f"Could not write reference index {cache_path}: {e}")
+    return file_map
+
+def distribute_files(destination_base_dir, delivery_mode=DEFAULT_DELIVERY_MODE, source_dir=REFERENCE_DIR, log=print, progress=None, cancel=None):
+    """Deliver the reference files into the sorted folders, returns True when every folder got all of them."""
+    if not os.path.exists(source_dir):
+        log(f"Source directory does not exist: {source_dir}")
+        return False
+    if not os.path.isdir(destination_base_dir):
+        log(f"Destination directory does not exist: {destination_base_dir}")
+        return False
+
+    # Map base names to a list of full filenames, only re-listed when the reference folder changed
+    with span('distribute.reference_index', source_dir):
+        file_map = load_reference_index(source_dir, log)
+
+    # Loop through each folder in the destination directory
+    catalog = get_catalog()
+    with span('distribute.list_destination', destination_base_dir):
+        folders = [entry.name for entry in catalog.list_directory(destination_base_dir, describe_entry) if entry.is_dir]
+    # Folder names start with the base name of their references
+    targets = [folder for folder in folders if folder.split('.')[0] in file_map]
+    report = item_reporter(None, progress, len(targets))
+    referenced = []
+    for handled, folder in enumerate(targets):
+        if cancelled(cancel):
+            log(f"Cancelled after {handled} of {len(targets)} folders.")
+            catalog.set_state(destination_base_dir, referenced, 'referenced')
+            return False
+        folder_base_name = folder.split('.')[0]
+        destination_dir = os.path.join(destination_base_dir, folder)
+        delivered_all = True
+        for source_filename in file_map[folder_base_name]:
+            source_file = os.path.join(source_dir, source_filename)
+            destination_file = os.path.join(destination_dir, source_filename)
+            with span('distribute.deliver', destination_file) as record:
+                try:
+                    delivered = deliver_file(source_file, destination_file, delivery_mode)
+                    record['outcome'] = 'skipped' if delivered == 'skipped' else 'ok'
+                    record['mode'] = delivered
+                    if delivered == 'skipped':
+                        log(f"Unchanged {source_filename} in {folder}")
+                    else:
+                        if tracing():
+                            record['bytes'] = os.path.getsize(destination_file)
+                        log(f"Copied {source_filename} to {folder} ({delivered})")
+                except Exception as e:
+                    record['outcome'] = type(e).__name__
+                    delivered_all = False
+                    log(f"Error copying file {source_file} to {destination_file}: {e}")
+        if delivered_all:
+            referenced.append(folder)
+        report(f"References delivered to {folder}" if delivered_all else f"Some references not delivered to {folder}",
+               'ok' if delivered_all else 'error')
+    catalog.set_state(destination_base_dir, referenced, 'referenced')
+    return len(referenced) == len(targets)
+
+
+# Sequencing Log Processor
+
+def load_bbid_data(file_path, log=print):
+    log(f"Loading BBID data from: {file_path}")
+    try:
+        # Job ID -> BBID, served from the local index cache unless the job log has changed
+        bbid_data = load_bbid_mapping(file_path)
+        log(f"BBID data loaded successfully with {len(bbid_data)} records")
+        return bbid_data
+    except Exception as e:
+        log(f"Error loading BBID data: {e}")
+        return None
+
+# Columns of the 'Combined Log' sheet
+LOG_SHEET = 'Combined Log'
+LOG_COLUMNS = ['Seq Plate', 'Folder name', 'Job ID', 'Vector ID', 'BBID', 'Sg SS OK', 'Sg DS OK', 'Sg Mutation or FAIL', 'Sg Primer to repeat']
+
+# Plates carry five rows of instrument metadata and a header row before the data
+PLATE_FIRST_DATA_ROW = 7
+
+# Function to stream the data rows of a plate's first sheet, one row at a time
+def iter_plate_rows(file_path):
+    if file_path.endswith('.xls'):
+        import xlrd
+        # on_demand leaves the other sheets unread
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            sheet = book.sheet_by_index(0)
+            for row_index in range(PLATE_FIRST_DATA_ROW - 1, sheet.nrows):
+                yield sheet.row_values(row_index)
+        finally:
+            book.release_resources()
+    else:
+        import openpyxl
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(min_row=PLATE_FIRST_DATA_ROW, values_only=True)
+        finally:
+            workbook.close()
+
+def iter_plate_pairs(file_path):
+    """Yield the distinct (vector, job) pairs of the '<vector>._.<job>' cells of a plate.
+
+    Only the first column holding such a cell is used, as the old whole-sheet lookup did.
+    Rows are read one at a time and only cells up to that column are looked at, so
+    memory depends on the number of samples rather than the size of the sheet.
+    """
+    # (vector, job) -> None keeps the pairs distinct and in row order
+    pairs = {}
+    first_column = None
+    for row in iter_plate_rows(file_path):
+        if first_column is not None:
+            row = row[:first_column + 1]
+        for column, value in enumerate(row):
+            if isinstance(value, str) and '._.' in value:
+                if first_column is None or column < first_column:
+                    # An earlier column wins, the pairs of the later one are dropped
+                    first_column, pairs = column, {}
+                parts = value.split('._.', 2)
+                pairs[(parts[0], parts[1])] = None
+                break
+    yield from pairs
+
+def process_file(file_path, bbid_data):
+    import pandas as pd
+    print(f"Processing file: {file_path}")
+
+    try:
+        with span('log.read_plate', file_path) as record:
+            pairs = list(iter_plate_pairs(file_path))
+            if tracing():
+                record['bytes'] = os.path.getsize(file_path)
+
+        if not pairs:
+            print(f"No suitable column found in {file_path}")
+            return None
+
+        unique_data = pd.DataFrame([(f"{job_id}.{vector_id}", job_id, vector_id) for vector_id, job_id in pairs],
+                                   columns=['Folder name', 'Job ID', 'Vector ID'])
+        unique_data['BBID'] = unique_data['Job ID'].map(bbid_data)
+
+        log_df = unique_data.reindex(columns=LOG_COLUMNS[1:])
+
+        seq_plate = os.path.splitext(os.path.basename(file_path))[0]
+        log_df.insert(0, 'Seq Plate', seq_plate)
+
+        print(f"Processed data for: {seq_plate}")
+        return log_df
+
+    except Exception as e:
+        print(f"Error processing file {file_path}: {e}")
+        return None
+
+# BBID data handed to each worker process once, instead of pickled with every plate
+_worker_bbid_data = None
+
+def _init_worker(bbid_data):
+    global _worker_bbid_data
+    _worker_bbid_data = bbid_data
+    # Spans are only recorded in the parent, which times the whole parse
+    detach_tracing()
+
+def _process_file_in_worker(file_path):
+    return process_file(file_path, _worker_bbid_data)
+
+def iter_processed_files(file_paths, bbid_data, workers=1):
+    # Results are yielded as plates finish, in the same order as file_paths whatever the worker count
+    if workers <= 1 or len(file_paths) <= 1:
+        for file_path in file_paths:
+            yield process_file(file_path, bbid_data)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(file_paths)), initializer=_init_worker, initargs=(bbid_data,))
+    try:
+        yield from executor.map(_process_file_in_worker, file_paths)
+    finally:
+        # A caller that stops early (cancelled) does not wait for the plates not started yet
+        executor.shutdown(cancel_futures=True)
+
+# Manifest of plates already written to a log, kept next to the logs
+MANIFEST_NAME = 'processed_plates.json'
+
+def load_manifest(log_dir, log=print):
+    manifest_path = os.path.join(log_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"Error reading manifest {manifest_path}, all plates will be processed: {e}")
+        return {}
+
+def save_manifest(log_dir, manifest):
+    manifest_path = os.path.join(log_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+# Function to list the plate files with their size and mtime in a single directory scan
+def list_plates(source_dir):
+    plates = []
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.xls') or entry.name.endswith('.xlsx'):
+                stat = entry.stat()
+                plates.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    return plates
+
+# Function to start writing a log, with the rows of the existing one first when keep_existing is set
+def open_log_writer(log_file, keep_existing=False, replaced_plates=(), sidecars=(), log=print):
+    writer = TableWriter(log_file, log)
+    sheet = writer.sheet(LOG_SHEET, LOG_COLUMNS, sidecars)
+    if keep_existing and os.path.exists(log_file):
+        try:
+            # Streamed into the new workbook, leaving out earlier rows of re-processed plates
+            for row in iter_sheet_rows(log_file, LOG_SHEET):
+                if row and row[0] not in replaced_plates:
+                    sheet.append(row)
+        except Exception:
+            writer.abort()
+            raise
+    return writer, sheet
+
+def generate_sequencing_log(source_dir, log_dir, bbid_source_file=JOB_LOG_PATH, workers=1, incremental=False, sidecars=(),
+                            log=print, progress=None, cancel=None):
+    """Write "<date> - log.xlsx" in log_dir from the plates in source_dir.
+
+    Rows are written as each plate finishes. sidecars lists extra formats from
+    SIDECAR_FORMATS ('csv', 'parquet') written next to the log with the same rows.
+    A cancelled run writes nothing and leaves the manifest as it was.
+    Returns (success, status message) for the caller to display.
+    """
+    if not os.path.exists(source_dir):
+        return False, f"Source directory does not exist: {source_dir}"
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+        log(f"Created log directory: {log_dir}")
+
+    with span('log.bbid_data', bbid_source_file):
+        bbid_data = load_bbid_data(bbid_source_file, log)
+    if bbid_data is None:
+        return False, "Failed to load BBID data, no log files created."
+
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    log_file = os.path.join(log_dir, f"{current_date} - log.xlsx")
+
+    with span('log.list_plates', source_dir):
+        plates = list_plates(source_dir)
+    manifest = load_manifest(log_dir, log) if incremental else {}
+    if incremental:
+        # Only plates that are new or have changed since they were logged
+        plates = [(path, size, mtime) for path, size, mtime in plates
+                  if manifest.get(path, {}).get('size') != size or manifest.get(path, {}).get('mtime') != mtime]
+        if not plates:
+            return True, "No new or changed plates. Log files are up to date."
+
+    file_paths = [path for path, _, _ in plates]
+    # Plates logged earlier into today's log are replaced rather than duplicated
+    replaced_plates = {os.path.splitext(os.path.basename(path))[0] for path in file_paths
+                       if manifest.get(path, {}).get('log_file') == log_file}
+
+    # Rows logged per plate (None when it gave no data), for the manifest
+    plate_rows = []
+    writer = sheet = None
+    report = item_reporter(None, progress, len(file_paths))
+    try:
+        with span('log.parse_plates', f"{len(file_paths)} plates") as record:
+            plates_done = iter_processed_files(file_paths, bbid_data, workers)
+            for file_path, processed_data in zip(file_paths, plates_done):
+                if cancelled(cancel):
+                    plates_done.close()
+                    if writer is not None:
+                        writer.abort()
+                    return False, f"Cancelled after {len(plate_rows)} of {len(file_paths)} plates, no log file written."
+                plate_rows.append(None if processed_data is None else len(processed_data))
+                plate_name = os.path.basename(file_path)
+                report(f"No data in {plate_name}" if processed_data is None else f"Logged {plate_name}",
+                       'skipped' if processed_data is None else 'ok')
+                if processed_data is None:
+                    continue
+                # The log is only started by the first plate with data
+                if writer is None:
+                    writer, sheet = open_log_writer(log_file, incremental, replaced_plates, sidecars, log)
+                sheet.append_frame(processed_data)
+            record['bytes'] = sum(size for _, size, _ in plates)
+        if writer is not None:
+            with span('log.write', log_file):
+                writer.close()
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    plates_logged = sum(rows is not None for rows in plate_rows)
+    if writer is None:
+        result = False, "No data processed. Log file not created."
+    elif incremental:
+        result = True, f"Log file has been updated with {plates_logged} plate(s): {log_file}"
+    else:
+        result = True, f"Log file has been created successfully: {log_file}"
+
+    # Record every plate handled in this run, so the next incremental run skips it
+    manifest = load_manifest(log_dir, log)
+    for (path, size, mtime), rows in zip(plates, plate_rows):
+        manifest[path] = {'size': size, 'mtime': mtime, 'rows': rows or 0,
+                          'log_file': log_file if rows is not None else None}
+    save_manifest(log_dir, manifest)
+    return result
+
+
+# Folder Operations: Rename, Zip and Unzip
+
+# Extensions whose content is already compressed, deflating them again only costs time
+PRECOMPRESSED_EXTENSIONS = ('.zip', '.gz', '.7z', '.rar', '.png', '.jpg', '.jpeg', '.pdf', '.xlsx', '.docx')
+
+# Compression per file extension as (method, level), '' is used for any other extension
+COMPRESSION_PRESETS = {
+    'Balanced': {
+        '.txt': (zipfile.ZIP_DEFLATED, 6),
+        '.fasta': (zipfile.ZIP_DEFLATED, 6),
+        '.seq': (zipfile.ZIP_DEFLATED, 6),
+        '.ab1': (zipfile.ZIP_DEFLATED, 1),
+        **{ext: (zipfile.ZIP_STORED, None) for ext in PRECOMPRESSED_EXTENSIONS},
+        '': (zipfile.ZIP_DEFLATED, 6),
+    },
+    'Smallest': {
+        '.ab1': (zipfile.ZIP_DEFLATED, 9),
+        **{ext: (zipfile.ZIP_STORED, None) for ext in PRECOMPRESSED_EXTENSIONS},
+        '': (zipfile.ZIP_DEFLATED, 9),
+    },
+    'Fastest': {
+        **{ext: (zipfile.ZIP_STORED, None) for ext in PRECOMPRESSED_EXTENSIONS},
+        '': (zipfile.ZIP_DEFLATED, 1),
+    },
+    'No compression': {
+        '': (zipfile.ZIP_STORED, None),
+    },
+}
+DEFAULT_COMPRESSION_PRESET = 'Balanced'
+
+# Function to pick the (method, level) for a file from a compression policy
+def compression_for(filename, policy):
+    extension = os.path.splitext(filename)[1].lower()
+    return policy.get(extension, policy.get('', (zipfile.ZIP_STORED, None)))
+
+def rename_folders(main_folder, excel_path, log=print, progress=None):
+    """Rename the folders of main_folder from the reference workbook, returns True when no rename failed."""
+    # Function to extract work number from folder name
+    def extract_work_number(folder_name):
+        return folder_name[:9]
+
+    # Function to get today's date in the format YYYY-MM-DD
+    def get_today_date():
+        return date.today().strftime("%Y-%m-%d")
+
+    catalog = get_catalog()
+    # Work numbers of the folders without a row in the reference index, found while planning
+    unmatched = []
+
+    def make_plan():
+        # Load the Work Number -> (BBID, Vector) index, re-parsed only when the reference file changes
+        try:
+            with span('rename.reference_index', excel_path):
+                ref_index, duplicates = load_index_with_duplicates(excel_path, 'Work Number', ('BBID', 'Vector'), key_as_str=True)
+        except FileNotFoundError:
+            log(f"Error: Excel file not found at {excel_path}")
+            return None
+        except MissingColumnsError as e:
+            log(f"Error: The following required columns are missing from the Excel file: {', '.join(e.missing)}")
+            return None
+
+        log(f"Loaded {len(ref_index)} work numbers from the Excel file")
+
+        # Report work numbers listed more than once, the first row is the one used
+        if duplicates:
+            listed = ', '.join(f"{work_number} ({count} rows)" for work_number, count in sorted(duplicates.items())[:20])
+            more = f" and {len(duplicates) - 20} more" if len(duplicates) > 20 else ""
+            log(f"Warning: {len(duplicates)} work numbers appear more than once, using the first row: {listed}{more}")
+
+        # Check if the main folder exists
+        if not os.path.exists(main_folder):
+            log(f"Error: The main folder does not exist at {main_folder}")
+            return None
+
+        # Collect all subfolders in the main folder
+        folder_names = [entry.name for entry in catalog.list_directory(main_folder, describe_entry) if entry.is_dir]
+
+        # Plan a rename for every folder with a matching row in the reference index
+        plan = []
+        for folder_name in folder_names:
+            # Extract work number from the folder name
+            work_number = extract_work_number(folder_name)
+            matching_row = ref_index.get(work_number)
+            if matching_row is not None:
+                bbid, vector = matching_row
+                new_folder_name = f"{work_number}.{bbid} in {vector} {get_today_date()}"
+                plan.append([folder_name, new_folder_name, work_number, bbid])
+            else:
+                unmatched.append(work_number)
+        return plan
+
+    # An interrupted run is finished without reading the workbook or listing again
+    journal = Journal('rename', main_folder)
+    planned = journal.resume_or_plan(make_plan, log, 'folders')
+    if planned is None:
+        return False
+    plan, done, pending, resumed = planned
+    report = item_reporter(log, progress, len(unmatched) + len(pending))
+    for work_number in unmatched:
+        report(f"No matching work number found for: {work_number}", 'unmatched')
+
+    failed = False
+    for index, (folder_name, new_folder_name, work_number, bbid) in pending:
+        folder_path = os.path.join(main_folder, folder_name)
+        new_folder_path = os.path.join(main_folder, new_folder_name)
+
+        # Rename the folder
+        with span('rename.folder', folder_name) as record:
+            try:
+                try:
+                    os.rename(folder_path, new_folder_path)
+                except FileNotFoundError:
+                    # Renamed before the run was interrupted
+                    if not resumed or not os.path.isdir(new_folder_path):
+                        raise
+                journal.done(index)
+                catalog.move(main_folder, folder_name, main_folder, new_folder_name,
+                             work_number=work_number, bbid=bbid, state='renamed')
+                report(f"Renamed: {folder_name} -> {new_folder_name}")
+            except PermissionError:
+                record['outcome'] = 'PermissionError'
+                failed = True
+                report(f"Error: Permission denied when trying to rename {folder_name}", 'error')
+            except FileExistsError:
+                record['outcome'] = 'FileExistsError'
+                failed = True
+                report(f"Error: A folder with the name {new_folder_name} already exists", 'error')
+    journal.finish()
+    log("Folder renaming completed.")
+    return not failed
+
+def zip_folder(folder_path, zip_name, compression_policy):
+    """Archive folder_path to zip_name and verify it, returns (bytes in, bytes out, seconds)."""
+    # Write under a temporary name so an unfinished archive never looks complete
+    start = time.perf_counter()
+    part_name = f"{zip_name}.part"
+    try:
+        file_count = 0
+        with span('zip.write', zip_name) as record, ZipFile(part_name, 'w') as zipf:
+            for root, _, files in os.walk(folder_path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    arcname = os.path.relpath(file_path, start=folder_path)
+                    compress_type, compresslevel = compression_for(file, compression_policy)
+                    zipf.write(file_path, arcname, compress_type=compress_type, compresslevel=compresslevel)
+                    file_count += 1
+            total_bytes = sum(info.file_size for info in zipf.infolist())
+            compressed_bytes = sum(info.compress_size for info in zipf.infolist())
+            record['bytes'] = total_bytes
+
+        # Check every member's CRC before the archive takes its final name
+        with span('zip.verify', zip_name) as record, ZipFile(part_name, 'r') as zipf:
+            record['bytes'] = compressed_bytes
+            bad_member = zipf.testzip()
+            member_count = len(zipf.infolist())
+        if bad_member is not None or member_count != file_count:
+            raise zipfile.BadZipFile(f"verification failed ({bad_member or f'{member_count} of {file_count} files'})")
+    except BaseException:
+        # A failed write (unreadable file, share gone) or verification leaves no partial archive behind
+        try:
+            os.remove(part_name)
+        except OSError:
+            pass
+        raise
+    os.replace(part_name, zip_name)
+    return total_bytes, compressed_bytes, time.perf_counter() - start
+
+def zip_folders(folder_directory, max_workers=DEFAULT_ZIP_WORKERS, compression_policy=None, log=print, progress=None):
+    """Zip every folder of folder_directory, returns True when every folder was zipped and removed."""
+    compression_policy = compression_policy or COMPRESSION_PRESETS[DEFAULT_COMPRESSION_PRESET]
+
+    catalog = get_catalog()
+
+    journal = Journal('zip', folder_directory)
+    plan, done, pending, resumed = journal.resume_or_plan(
+        lambda: [entry.name for entry in catalog.list_directory(folder_directory, describe_entry) if entry.is_dir],
+        log, 'folders')
+    # Folders whose archive was verified before the interruption only have their removal left
+    archived = sorted(index for index, result in done.items() if result == 'archived')
+    if archived:
+        log(f"{len(archived)} folder(s) were archived before the interruption and are removed now")
+        pending = sorted(pending + [(index, plan[index]) for index in archived])
+
+    def zip_planned(index, folder_name):
+        if done.get(index) == 'archived':
+            return None
+        folder_path = os.path.join(folder_directory, folder_name)
+        zip_name = os.path.join(folder_directory, f"{folder_name}.zip")
+        if not os.path.isdir(folder_path):
+            # Archiving a missing folder would replace a good archive with an empty one
+            raise FileNotFoundError(f"folder to zip is missing: {folder_path}")
+        result = zip_folder(folder_path, zip_name, compression_policy)
+        # On disk before the source is removed, so a resumed run never archives a half-removed folder again
+        journal.done(index, 'archived')
+        journal.sync()
+        return result
+
+    report = item_reporter(log, progress, len(pending))
+
+    # Several archives are built at once, each source folder is removed only after its own archive verified
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(zip_planned, index, folder_name): (index, folder_name) for index, folder_name in pending}
+        for future in as_completed(futures):
+            index, folder_name = futures[future]
+            folder_path = os.path.join(folder_directory, folder_name)
+            zip_name = os.path.join(folder_directory, f"{folder_name}.zip")
+            try:
+                result = future.result()
+                if result is None:
+                    zipped = f"'{zip_name}' was verified before the interruption"
+                else:
+                    total_bytes, compressed_bytes, elapsed = result
+                    rate = total_bytes / 1e6 / elapsed if elapsed > 0 else 0.0
+                    zipped = f"Zipped '{folder_name}' to '{zip_name}' ({total_bytes / 1e6:.1f} MB -> {compressed_bytes / 1e6:.1f} MB in {elapsed:.1f} s, {rate:.1f} MB/s)"
+            except Exception as e:
+                failed = True
+                report(f"Error zipping '{folder_name}': {e}", 'error')
+                continue
+
+            with span('zip.remove_source', folder_name) as record:
+                try:
+                    try:
+                        shutil.rmtree(folder_path)
+                    except FileNotFoundError:
+                        # Removed before the run was interrupted
+                        if not resumed:
+                            raise
+                    journal.done(index)
+                    catalog.move(folder_directory, folder_name, folder_directory, os.path.basename(zip_name),
+                                 is_dir=False, size=None, mtime_ns=None, state='zipped')
+                    report(f"{zipped}\nRemoved original folder '{folder_name}'")
+                except Exception as e:
+                    record['outcome'] = type(e).__name__
+                    failed = True
+                    report(f"{zipped}\nError removing folder '{folder_name}': {e}", 'error')
+    journal.finish()
+    log("Zipping complete.")
+    return not failed
+
+# Function to split an archive member name into safe relative path parts
+def member_path_parts(member_name):
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    # Drop a drive letter such as 'C:' so members can only land inside the target folder
+    if parts and parts[0].endswith(':'):
+        parts = parts[1:]
+    return parts
+
+# Function to get the single top-level folder every member sits in, or None
+def wrapper_folder(members):
+    top_names = set()
+    has_nested = False
+    for member in members:
+        parts = member_path_parts(member.filename)
+        if not parts:
+            continue
+        top_names.add(parts[0])
+        has_nested = has_nested or len(parts) > 1 or member.is_dir()
+        if len(top_names) > 1:
+            return None
+    return top_names.pop() if len(top_names) == 1 and has_nested else None
+
+def unzip_file(zip_file, extract_folder):
+    with span('unzip.extract', zip_file) as record, zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        os.makedirs(extract_folder, exist_ok=True)
+        members = zip_ref.infolist()
+        record['bytes'] = sum(member.file_size for member in members)
+        # A single wrapper folder is dropped from member paths while extracting
+        strip = 1 if wrapper_folder(members) is not None else 0
+        for member in members:
+            parts = member_path_parts(member.filename)[strip:]
+            if not parts:
+                continue
+            target = os.path.join(extract_folder, *parts)
+            if member.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Copy in chunks so large members are never held in memory
+            with zip_ref.open(member) as source, open(target, 'wb') as destination:
+                shutil.copyfileobj(source, destination, 1024 * 1024)
+    os.remove(zip_file)
+
+def unzip_files(directory, max_workers=DEFAULT_ZIP_WORKERS, log=print, progress=None):
+    """Extract and delete every archive of directory, returns True when all of them were extracted."""
+    catalog = get_catalog()
+    journal = Journal('unzip', directory)
+    plan, done, pending, resumed = journal.resume_or_plan(
+        lambda: [entry.name for entry in catalog.list_directory(directory, describe_entry)
+                 if not entry.is_dir and entry.name.endswith('.zip')],
+        log, 'archives')
+
+    def unzip_planned(filename, extract_folder):
+        try:
+            unzip_file(os.path.join(directory, filename), extract_folder)
+        except FileNotFoundError:
+            # The archive is only deleted once extracted, so it was finished before the interruption
+            if not resumed or not os.path.isdir(extract_folder):
+                raise
+
+    report = item_reporter(log, progress, len(pending))
+
+    # Several archives are extracted at once, each is deleted only after all its members are written
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        for index, filename in pending:
+            extract_folder = os.path.join(directory, os.path.splitext(filename)[0])
+            futures[executor.submit(unzip_planned, filename, extract_folder)] = (index, filename, extract_folder)
+        for future in as_completed(futures):
+            index, filename, extract_folder = futures[future]
+            try:
+                future.result()
+                journal.done(index)
+                catalog.move(directory, filename, directory, os.path.basename(extract_folder),
+                             is_dir=True, size=None, mtime_ns=None, state='unzipped')
+                report(f"Extracted '{filename}' to '{extract_folder}' and deleted '{filename}'.")
+            except Exception as e:
+                failed = True
+                report(f"Error extracting '{filename}': {e}", 'error')
+    journal.finish()
+    log("Unzipping complete.")
+    return not failed
+
+
+# Data Cleanup
+
+# Zips already written to the project completion records, kept next to the records
+COMPLETION_STATE_NAME = 'project_completion_seen.json'
+
+def create_project_completion_excel(folder, excel_path, log=print):
+    import pandas as pd
+    import openpyxl
+    log("Updating project completion Excel sheet...")
+
+    # Zips recorded by earlier runs, keyed by uploaded folder and then by file name
+    state_path = os.path.join(os.path.dirname(excel_path), COMPLETION_STATE_NAME)
+    folder_key = os.path.abspath(folder)
+    folders = {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        # Records from before the state was kept per folder hold a single folder
+        folders = state['folders'] if 'folders' in state else {state['folder']: state['zips']}
+    except (OSError, ValueError, KeyError):
+        pass
+    seen = folders.get(folder_key, {})
+
+    catalog = get_catalog()
+    current = {}
+    changed_files = []
+    with span('cleanup.scan_uploaded', folder):
+        # Always a fresh listing: a catalog hit keeps the size and mtime of a zip overwritten in place
+        catalog.forget(folder)
+        for entry in catalog.list_directory(folder, describe_entry):
+            if entry.is_dir or not entry.name.endswith('.zip'):
+                continue
+            record = seen.get(entry.name)
+            # A fresh Windows listing carries the size and mtime, elsewhere the catalog's may be old so each zip is stat'ed
+            stat = None if os.name == 'nt' else os.stat(os.path.join(folder, entry.name))
+            size, mtime_ns = (entry.size, entry.mtime_ns) if stat is None else (stat.st_size, stat.st_mtime_ns)
+            if record is None or (record['size'], record['mtime']) != (size, mtime_ns):
+                stat = stat or os.stat(os.path.join(folder, entry.name))
+                record = {
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns,
+                    'date_created': datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+                }
+                changed_files.append(entry.name)
+                catalog.record(folder, entry.name, False, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            current[entry.name] = record
+    catalog.set_state(folder, list(current), 'uploaded')
+
+    data = [{'File Name': file, 'Date Created': record['date_created']} for file, record in current.items()]
+    df = pd.DataFrame(data, columns=['File Name', 'Date Created'])
+    df['Work Number'] = df['File Name'].str[:9]
+
+    with span('cleanup.completion_record', excel_path):
+        if not os.path.exists(excel_path):
+            # First run of the month writes every known zip from the saved records
+            df.to_excel(excel_path, index=False)
+            log(f"Excel sheet created at: {excel_path}")
+        elif changed_files:
+            workbook = openpyxl.load_workbook(excel_path)
+            sheet = workbook.active
+            # Zips already in this month's sheet (from this or another uploaded folder) are updated in place
+            rows = {row[0].value: row for row in sheet.iter_rows(min_row=2, max_col=3) if row[0].value is not None}
+            added = updated = 0
+            for file in changed_files:
+                date_created = current[file]['date_created']
+                if file in rows:
+                    if rows[file][1].value != date_created:
+                        rows[file][1].value = date_created
+                        updated += 1
+                else:
+                    sheet.append([file, date_created, file[:9]])
+                    added += 1
+            if added or updated:
+                workbook.save(excel_path)
+                log(f"Added {added} new and updated {updated} changed zip(s) in: {excel_path}")
+            else:
+                log(f"No new zips, Excel sheet unchanged: {excel_path}")
+        else:
+            log(f"No new zips, Excel sheet unchanged: {excel_path}")
+
+    folders[folder_key] = current
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'folders': folders}, f)
+    os.replace(tmp_path, state_path)
+    return df
+
+def cleanup_sorted_sequencing(sorted_folder, output_folder, completed_projects, cleanup_record_path, max_workers=DEFAULT_MOVE_WORKERS, log=print, progress=None, sidecars=()):
+    log("Performing cleanup operation...")
+
+    catalog = get_catalog()
+
+    def make_plan():
+        completed_work_numbers = {str(work_number) for work_number in completed_projects['Work Number'].dropna()}
+
+        # Folder work numbers are the first 9 characters of the name, looked up on the catalog's index
+        with span('cleanup.scan_sorted', sorted_folder):
+            catalog.list_directory(sorted_folder, describe_entry)
+            return [entry.name for entry in catalog.folders_with_work_numbers(sorted_folder, completed_work_numbers)]
+
+    journal = Journal('cleanup', sorted_folder, output_folder)
+    plan, done, pending, resumed = journal.resume_or_plan(make_plan, log, 'folders')
+    to_move = [(index, folder, os.path.join(sorted_folder, folder), os.path.join(output_folder, folder))
+               for index, folder in pending]
+
+    def move_folder(folder, folder_path, destination_path):
+        with span('cleanup.move', folder):
+            # A rename is a single metadata operation when both folders are on the same device
+            try:
+                os.rename(folder_path, destination_path)
+            except FileNotFoundError:
+                # Moved before the run was interrupted
+                if not resumed or not os.path.isdir(destination_path):
+                    raise
+            except OSError:
+                shutil.move(folder_path, destination_path)
+        return {
+            'Folder Name': folder,
+            'Original Path': folder_path,
+            'New Path': destination_path,
+            'Date Moved': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    # Folders moved before an interruption still go into the record
+    moved_folders = list(done.values())
+    log_lines = []
+    report = item_reporter(log_lines.append, progress, len(to_move))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(move_folder, *move[1:]) for move in to_move]
+        for (index, folder, _, destination_path), future in zip(to_move, futures):
+            try:
+                moved = future.result()
+                journal.done(index, moved)
+                moved_folders.append(moved)
+                catalog.move(sorted_folder, folder, output_folder, state='cleaned')
+                report(f"Moved folder: {folder} to {destination_path}")
+            except Exception as e:
+                report(f"Error moving folder {folder}: {e}", 'error')
+
+    # Without a progress callable, one message for the whole batch
+    if log_lines:
+        log('\n'.join(log_lines))
+    log(f"Moved {len(moved_folders)} of {len(plan)} completed folders.")
+
+    create_cleanup_record(cleanup_record_path, moved_folders, log, sidecars)
+    journal.finish()
+    return len(moved_folders) == len(plan)
+
+# Columns of the 'Moved Folders' sheet, as returned by cleanup_sorted_sequencing's moves
+CLEANUP_RECORD_COLUMNS = ['Folder Name', 'Original Path', 'New Path', 'Date Moved']
+
+def create_cleanup_record(cleanup_record_path, moved_folders, log=print, sidecars=()):
+    log("Creating cleanup record...")
+
+    with span('cleanup.record', cleanup_record_path), TableWriter(cleanup_record_path, log) as writer:
+        sheet = writer.sheet('Moved Folders', CLEANUP_RECORD_COLUMNS, sidecars)
+        for moved in moved_folders:
+            sheet.append([moved[column] for column in CLEANUP_RECORD_COLUMNS])
+
+        # Add a summary sheet
+        summary = writer.sheet('Summary', ['Date', 'Total Folders Moved'])
+        summary.append([datetime.now().strftime('%Y-%m-%d'), len(moved_folders)])
+
+    log(f"Cleanup record created at: {cleanup_record_path}")
+
+def run_cleanup(uploaded_folder, sorted_folder, output_folder, log=print, progress=None, sidecars=()):
+    log("Starting cleanup process...")
+
+    excel_output_path = os.path.join(output_folder, f"{datetime.now().strftime('%Y-%m')} Project_Completion_Record.xlsx")
+    cleanup_record_path = os.path.join(output_folder, f"{datetime.now().strftime('%Y-%m-%d')} Data Clean Up Record.xlsx")
+
+    completed_projects = create_project_completion_excel(uploaded_folder, excel_output_path, log)
+    success = cleanup_sorted_sequencing(sorted_folder, output_folder, completed_projects, cleanup_record_path,
+                                        log=log, progress=progress, sidecars=sidecars)
+
+    log("Cleanup process completed.")
+    return success
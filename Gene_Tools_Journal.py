@@ -0,0 +1,129 @@
+"""Append-only journal of the file operations a bulk run plans and completes.
+
+Organize, rename, zip, unzip and cleanup write their plan to a journal under
+CACHE_DIR before changing anything on the share, then one line per completed
+item. The plan is fsynced straight away, completions in groups of SYNC_EVERY
+lines (or SYNC_INTERVAL seconds). finish() deletes the journal at the end of a
+run, so a journal that is still there belongs to a run that was interrupted.
+Every line is handed to the OS as it is written, so only a power cut or an OS
+crash can lose the completions since the last fsync.
+
+resume_or_plan() is how an operation starts: the next run of the same
+operation on the same folders takes its plan from the journal instead of
+listing the folders again, and skips the completed items. Items finished
+after the last fsync may be missing from the journal, so each operation
+recognises them from the files themselves (moved source gone and destination
+present) rather than doing them twice. An operation that cannot tell from
+the files, such as zip with an archive that is verified but whose source
+folder is only partly removed, journals that step before going on.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from Job_Log_Index import CACHE_DIR
+
+JOURNAL_DIR = os.path.join(CACHE_DIR, 'journals')
+
+# Completions written between two fsyncs
+SYNC_EVERY = 64
+SYNC_INTERVAL = 1.0
+
+
+class Journal:
+    def __init__(self, operation, *folders):
+        identity = json.dumps([operation] + [os.path.abspath(folder) for folder in folders])
+        digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(JOURNAL_DIR, f"{operation}-{digest}.jsonl")
+        self.lock = threading.Lock()
+        self.file = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def load(self):
+        """Return (plan, {index: result}) of an interrupted run, or None when there is none."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # A last line without its newline was torn by the interruption
+        complete = data[:data.rfind(b'\n') + 1]
+        plan, done = None, {}
+        for line in complete.decode('utf-8').splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'plan' in record:
+                plan = record['plan']
+            elif 'done' in record:
+                done[record['done']] = record.get('result')
+        if plan is None:
+            return None
+        if len(complete) < len(data):
+            # Cut the torn line off, otherwise the next completion is appended to it and lost
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(complete))
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return plan, done
+
+    def resume_or_plan(self, make_plan, log=print, noun='items'):
+        """Return (plan, done, pending, resumed) for a run, or None when make_plan() found nothing it could plan.
+
+        An interrupted run's plan comes from the journal and make_plan is not called,
+        otherwise the plan make_plan() returns is journaled before anything changes.
+        done maps the indexes completed before an interruption to their results,
+        pending holds the (index, item) pairs left to do.
+        """
+        loaded = self.load()
+        if loaded is not None:
+            plan, done = loaded
+            log(f"Resuming an interrupted run: {len(plan) - len(done)} of {len(plan)} {noun} left")
+        else:
+            plan = make_plan()
+            if plan is None:
+                return None
+            done = {}
+            self.plan(plan)
+        pending = [(index, item) for index, item in enumerate(plan) if index not in done]
+        return plan, done, pending, loaded is not None
+
+    def plan(self, items):
+        """Start a new journal with the planned items, on disk before the first change is made."""
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write(json.dumps({'plan': items, 'started': datetime.now().isoformat(timespec='seconds')}) + '\n')
+        self.sync()
+
+    def done(self, index, result=None):
+        record = {'done': index} if result is None else {'done': index, 'result': result}
+        with self.lock:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= SYNC_EVERY or time.monotonic() - self.last_sync >= SYNC_INTERVAL:
+                self._sync()
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def finish(self):
+        """The run got to its end: the journal is no longer needed."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,191 @@
+"""Streaming .xlsx output for the logs and records the tools write.
+
+TableWriter writes through an openpyxl write-only workbook: rows go to disk as
+they are appended, so memory stays the same however long the sheet gets. A
+sheet can also be written as CSV and/or Parquet sidecars next to the
+workbook ("<name>.csv", "<name>.parquet") for tools that should not have to
+parse Excel. Parquet needs pyarrow, without it the sidecar is skipped with a
+message. Sidecars of the same workbook that a run does not write again are
+removed when it closes, so they never hold older rows than the workbook.
+
+Everything is written under a temporary name and only takes the final name
+when the writer is closed without an error, so a failed run never leaves a
+half-written log behind.
+
+    with TableWriter(path, log) as writer:
+        sheet = writer.sheet('Combined Log', columns, sidecars=('csv',))
+        for row in rows:
+            sheet.append(row)
+"""
+import os
+import csv
+import math
+
+SIDECAR_FORMATS = ('csv', 'parquet')
+
+# Rows per Parquet row group, the only rows held in memory for a Parquet sidecar
+PARQUET_ROW_GROUP = 10_000
+
+
+# Function to get the path of a sidecar next to a workbook
+def sidecar_path(path, fmt):
+    return f"{os.path.splitext(path)[0]}.{fmt}"
+
+
+# Function to turn a pandas or openpyxl cell value into what is written: NaN becomes an empty cell
+def _clean(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class _CsvSidecar:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def append(self, row):
+        self.writer.writerow(['' if value is None else value for value in row])
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSidecar:
+    def __init__(self, path, columns):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.columns = columns
+        # Every column as text, as in the workbook the values come from
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def append(self, row):
+        self.rows.append(['' if value is None else str(value) for value in row])
+        if len(self.rows) >= PARQUET_ROW_GROUP:
+            self._write_group()
+
+    def _write_group(self):
+        if self.rows:
+            arrays = [self.pyarrow.array(values, self.pyarrow.string()) for values in zip(*self.rows)]
+            self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._write_group()
+        self.writer.close()
+
+
+class SheetWriter:
+    def __init__(self, worksheet, columns, sidecars):
+        self.worksheet = worksheet
+        self.columns = list(columns)
+        self.sidecars = sidecars
+        self.rows = 0
+        self.worksheet.append(_header_cells(worksheet, self.columns))
+
+    def append(self, row):
+        row = [_clean(value) for value in row][:len(self.columns)]
+        row += [None] * (len(self.columns) - len(row))
+        self.worksheet.append(row)
+        for sidecar in self.sidecars:
+            sidecar.append(row)
+        self.rows += 1
+
+    def append_frame(self, df):
+        """Append the rows of a DataFrame holding (at least) the sheet's columns."""
+        for row in df.reindex(columns=self.columns).itertuples(index=False, name=None):
+            self.append(row)
+
+
+# Function to style the header like pandas' to_excel does: bold, thin borders, centered
+def _header_cells(worksheet, columns):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    thin = Side(style='thin')
+    cells = []
+    for column in columns:
+        cell = WriteOnlyCell(worksheet, value=column)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        cells.append(cell)
+    return cells
+
+
+class TableWriter:
+    def __init__(self, path, log=print):
+        import openpyxl
+        self.path = path
+        self.log = log
+        self.workbook = openpyxl.Workbook(write_only=True)
+        # (temporary path, final path) of every file this writer produces
+        self.outputs = [(f"{path}.part", path)]
+        self.sidecars = []
+
+    def sheet(self, name, columns, sidecars=()):
+        """Add a sheet, with CSV/Parquet copies of it when sidecars names formats from SIDECAR_FORMATS."""
+        writers = []
+        for fmt in sidecars:
+            final_path = sidecar_path(self.path, fmt)
+            part_path = f"{final_path}.part"
+            try:
+                writers.append(_ParquetSidecar(part_path, columns) if fmt == 'parquet' else _CsvSidecar(part_path, columns))
+            except ImportError:
+                self.log(f"Parquet output needs the pyarrow package, {final_path} was not written.")
+                continue
+            self.outputs.append((part_path, final_path))
+        self.sidecars += writers
+        return SheetWriter(self.workbook.create_sheet(name), columns, writers)
+
+    def close(self):
+        """Save everything and move it to its final name."""
+        for sidecar in self.sidecars:
+            sidecar.close()
+        self.workbook.save(self.outputs[0][0])
+        for part_path, final_path in self.outputs:
+            os.replace(part_path, final_path)
+        written = {final_path for _, final_path in self.outputs}
+        for fmt in SIDECAR_FORMATS:
+            stale_path = sidecar_path(self.path, fmt)
+            if stale_path not in written and os.path.exists(stale_path):
+                os.remove(stale_path)
+                self.log(f"Removed {stale_path}, it was written by an earlier run and no longer matches {self.path}.")
+
+    def abort(self):
+        for sidecar in self.sidecars:
+            try:
+                sidecar.close()
+            except Exception:
+                pass
+        try:
+            # Saving is the only way to end openpyxl's row writers and remove its temporary files
+            self.workbook.save(self.outputs[0][0])
+        except Exception:
+            pass
+        for part_path, _ in self.outputs:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+# Function to stream the rows of an existing sheet below its header, without loading the workbook
+def iter_sheet_rows(path, sheet_name):
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook[sheet_name].iter_rows(min_row=2, values_only=True)
+    finally:
+        workbook.close()
@@ -0,0 +1,215 @@
+"""Batched progress reporting for the GUI front ends.
+
+The Qt worker threads hand a ProgressBatcher to the core operations as their
+`log` and `progress` callables. Every message goes to a detail file straight
+away. The window only receives stage messages and item problems, together
+with the done/total counters, in one flush at most every `interval` seconds,
+so a run over thousands of items costs the GUI a handful of updates.
+
+The Tk tools run their operations as a BackgroundJob instead: the operation
+runs on a worker thread and only puts its messages and counters on a queue,
+which the Tk main loop drains every POLL_INTERVAL_MS through after(). The
+window stays responsive, shows items/s and the time left, and can stop the
+run through the job's cancel event, which the operations check between items.
+"""
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Folder holding the detail files, can be overridden with GENE_TOOLS_LOG_DIR
+DETAIL_LOG_DIR = os.environ.get('GENE_TOOLS_LOG_DIR', os.path.join(os.path.expanduser('~'), '.gene_tools_logs'))
+
+# Seconds between two flushes to the window
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+# Problem lines shown in the window before pointing at the detail file instead
+DEFAULT_MAX_SHOWN_PROBLEMS = 100
+
+# Milliseconds between two polls of a background job's queue by the Tk main loop
+POLL_INTERVAL_MS = 100
+
+# Background jobs running at the same time, one per tab of the Tk tools is enough
+MAX_BACKGROUND_JOBS = 4
+
+
+# Function to get a new detail file path for one run of an operation
+def detail_log_path(operation):
+    os.makedirs(DETAIL_LOG_DIR, exist_ok=True)
+    return os.path.join(DETAIL_LOG_DIR, f"{datetime.now().strftime('%Y-%m-%d_%H%M%S')} {operation}.log")
+
+
+class ProgressBatcher:
+    def __init__(self, flush, detail_path=None, interval=DEFAULT_FLUSH_INTERVAL, max_shown_problems=DEFAULT_MAX_SHOWN_PROBLEMS):
+        # flush(lines, done, total, counters) is called with the lines to show and the counters text
+        self.flush_callback = flush
+        self.detail_path = detail_path
+        self.interval = interval
+        self.max_shown_problems = max_shown_problems
+        self.lock = threading.Lock()
+        self.detail_file = open(detail_path, 'a', encoding='utf-8') if detail_path else None
+        self.pending = []
+        self.done = 0
+        self.total = 0
+        self.outcomes = {}
+        self.shown_problems = 0
+        self.last_flush = 0.0
+
+    def _write_detail(self, message):
+        if self.detail_file is not None:
+            self.detail_file.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
+
+    def log(self, message):
+        """Stage message, always shown."""
+        with self.lock:
+            self._write_detail(message)
+            self.pending.append(message)
+        self._maybe_flush()
+
+    def progress(self, done, total, message, outcome='ok'):
+        """One finished item, only shown when its outcome is a problem."""
+        with self.lock:
+            self._write_detail(message)
+            self.done, self.total = done, total
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if outcome not in ('ok', 'skipped'):
+                self.shown_problems += 1
+                if self.shown_problems <= self.max_shown_problems:
+                    self.pending.append(message)
+                elif self.shown_problems == self.max_shown_problems + 1:
+                    self.pending.append(f"More problems are listed in {self.detail_path}")
+        self._maybe_flush()
+
+    def counters(self):
+        parts = [f"{self.done} of {self.total} done"]
+        parts += [f"{outcome}: {count}" for outcome, count in sorted(self.outcomes.items())]
+        return ', '.join(parts)
+
+    def _maybe_flush(self):
+        if time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            lines, self.pending = self.pending, []
+            done, total, counters = self.done, self.total, self.counters()
+        self.flush_callback(lines, done, total, counters)
+
+    def close(self):
+        """Send whatever is pending and close the detail file."""
+        self.flush()
+        with self.lock:
+            if self.detail_file is not None:
+                self.detail_file.close()
+                self.detail_file = None
+
+
+# Function to format a number of seconds as m:ss, or h:mm:ss from an hour on
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+# Function to format the done/total counters with the rate so far and the time left at that rate
+def rate_text(done, total, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    text = f"{done} of {total} done, {rate:.1f} items/s"
+    if rate > 0 and total > done:
+        text += f", about {format_duration((total - done) / rate)} left"
+    return text
+
+
+# Worker threads shared by every background job, created with the first one
+_job_executor = None
+_running_jobs = set()
+
+
+class BackgroundJob:
+    def __init__(self, widget, target, on_update, on_done, log=print):
+        # target(log, progress, cancel) runs on a worker thread, every other callback on the Tk thread:
+        # on_update(text, done, total) after each poll, on_done(result, error, cancelled) once at the end
+        self.widget = widget
+        self.target = target
+        self.on_update = on_update
+        self.on_done = on_done
+        self.log = log
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.started = None
+        self.done = 0
+        self.total = 0
+        self.problems = 0
+        self.last_message = ''
+
+    def start(self):
+        global _job_executor
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(max_workers=MAX_BACKGROUND_JOBS, thread_name_prefix='gene-tools-job')
+        self.started = time.monotonic()
+        _running_jobs.add(self)
+        self.future = _job_executor.submit(self.target, self._put_log, self._put_progress, self.cancel_event)
+        self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def cancel(self):
+        """Ask the operation to stop, it does so at its next item."""
+        self.cancel_event.set()
+
+    def running(self):
+        return self.future is not None and not self.future.done()
+
+    # Called on the worker thread, only touch the queue
+    def _put_log(self, message):
+        self.events.put((message, None))
+
+    def _put_progress(self, done, total, message, outcome='ok'):
+        self.events.put((message, (done, total, outcome)))
+
+    def status(self):
+        text = rate_text(self.done, self.total, time.monotonic() - self.started)
+        if self.problems:
+            text += f", {self.problems} problem(s)"
+        return text
+
+    def _poll(self):
+        # Everything the operation put on the queue before it finished is there once the future is done
+        finished = self.future.done()
+        while True:
+            try:
+                message, counters = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if counters is None:
+                self.log(message)
+                self.last_message = message
+                continue
+            self.done, self.total, outcome = counters
+            if outcome not in ('ok', 'skipped', 'cancelled'):
+                self.problems += 1
+                self.log(message)
+        # Redrawn on every poll once there are counters, so the time left keeps moving between items
+        if self.total:
+            self.on_update(self.status(), self.done, self.total)
+        if not finished:
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+            return
+        _running_jobs.discard(self)
+        error = self.future.exception()
+        self.on_done(None if error else self.future.result(), error, self.cancel_event.is_set())
+
+
+# Function to stop every running background job, for a window that is being closed
+def cancel_background_jobs(wait=True):
+    jobs = list(_running_jobs)
+    for job in jobs:
+        job.cancel()
+    if wait:
+        for job in jobs:
+            try:
+                job.future.result()
+            except Exception:
+                pass
@@ -0,0 +1,165 @@
+"""Per-stage timing for the gene synthesis tools.
+
+Operations wrap their stages and files in span():
+
+    with span('zip.folder', folder_name) as record:
+        ...
+        record['bytes'] = total_bytes
+
+A span records its duration, bytes and outcome ('ok', or the exception type
+when the block raised). Tracing is off until enable() is called, or the
+GENE_TOOLS_TRACE environment variable is set when this module is imported
+(to a .jsonl path, or to 1 for the summary only). While it is off, span()
+returns one shared do-nothing context manager.
+
+When enabled, every finished span is added to per-stage totals, and written
+as one JSON line to the trace file if there is one. summary() formats the
+stages that took longest.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+
+# Set to a Tracer by enable()
+_tracer = None
+
+# The parent's Tracer in a worker process, see detach()
+_detached_tracer = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        # Writes to this dict are discarded
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'record', 'start')
+
+    def __init__(self, tracer, stage, item):
+        self.tracer = tracer
+        self.record = {'stage': stage, 'item': item}
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.record
+        record['duration'] = time.perf_counter() - self.start
+        if exc_type is not None:
+            record['outcome'] = exc_type.__name__
+            record['error'] = str(exc)
+        else:
+            record.setdefault('outcome', 'ok')
+        self.tracer.add(record)
+        return False
+
+
+class Tracer:
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self.started = time.perf_counter()
+        # stage -> [count, total seconds, max seconds, bytes, errors]
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.trace_file = open(trace_path, 'a', encoding='utf-8') if trace_path else None
+
+    def add(self, record):
+        with self.lock:
+            totals = self.stages.get(record['stage'])
+            if totals is None:
+                totals = self.stages[record['stage']] = [0, 0.0, 0.0, 0, 0]
+            totals[0] += 1
+            totals[1] += record['duration']
+            totals[2] = max(totals[2], record['duration'])
+            totals[3] += record.get('bytes') or 0
+            if record['outcome'] not in ('ok', 'skipped'):
+                totals[4] += 1
+            if self.trace_file is not None:
+                line = dict(record, time=time.time(), thread=threading.current_thread().name, pid=os.getpid())
+                self.trace_file.write(json.dumps(line, default=str) + '\n')
+
+    def summary(self, top=10):
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        elapsed = time.perf_counter() - self.started
+        lines = [f"Slowest stages ({elapsed:.1f} s since tracing started, nested stages overlap):",
+                 f"  {'stage':<28} {'count':>7} {'total (s)':>10} {'mean (ms)':>10} {'max (ms)':>9} {'MB':>9} {'errors':>6}"]
+        for stage, (count, total, longest, size, errors) in stages:
+            lines.append(f"  {stage:<28} {count:>7} {total:>10.3f} {total / count * 1000:>10.2f} "
+                         f"{longest * 1000:>9.1f} {size / 1e6:>9.1f} {errors:>6}")
+        return '\n'.join(lines)
+
+    def close(self):
+        with self.lock:
+            if self.trace_file is not None:
+                self.trace_file.close()
+                self.trace_file = None
+
+
+def enable(trace_path=None):
+    """Start recording spans, appending them to trace_path when given. Returns the Tracer."""
+    global _tracer
+    disable()
+    _tracer = Tracer(trace_path)
+    return _tracer
+
+
+def disable():
+    """Stop recording and close the trace file, returns the Tracer that was active (or None)."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def detach():
+    """Stop recording in a forked worker process, leaving the trace file inherited from the parent alone.
+
+    Closing it would write the parent's unflushed lines to the file a second
+    time, so the Tracer is kept referenced and the file is never flushed: the
+    worker ends without running finalizers.
+    """
+    global _tracer, _detached_tracer
+    if _tracer is not None:
+        _detached_tracer, _tracer = _tracer, None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(stage, item=None):
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, stage, item)
+
+
+def summary(top=10):
+    return _tracer.summary(top) if _tracer is not None else ''
+
+
+# GENE_TOOLS_TRACE turns tracing on for the GUIs too, the summary is printed when the tool exits
+if os.environ.get('GENE_TOOLS_TRACE'):
+    _env_value = os.environ['GENE_TOOLS_TRACE']
+    enable(None if _env_value == '1' else _env_value)
+
+    def _print_summary_at_exit():
+        if _tracer is not None:
+            print(_tracer.summary())
+            _tracer.close()
+
+    atexit.register(_print_summary_at_exit)
@@ -1,33 +1,10 @@
-import os
-import shutil
-import re
-import pandas as pd
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog
 from tkinter import ttk
-
-# Function to extract Job ID and Plasmid Number from filename
-def extract_info(filename):
-    pattern = re.compile(r'(.+?)_(.+?)_(.+)')
-    match = pattern.match(filename)
-    if match:
-        plasmid_number = match.group(1)
-        job_id = match.group(2).strip('.')
-        return job_id, plasmid_number
-    return None, None
-
-# Function to get the BBID for a given job ID
-def get_bbid_mapping(excel_path):
-    if not os.path.exists(excel_path):
-        print(f"Excel file does not exist: {excel_path}")
-        return {}
-    try:
-        df = pd.read_excel(excel_path, sheet_name='WGK - Initiated')
-        bbid_mapping = pd.Series(df['BBID'].values, index=df['JOB (WORK) ID']).to_dict()
-        return bbid_mapping
-    except Exception as e:
-        print(f"Error reading Excel file: {e}")
-        return {}
+from Gene_Tools_Core import (DEFAULT_DELIVERY_MODE, DEFAULT_IO_WORKERS, DELIVERY_MODES, distribute_files, organize_files,
+                             warm_up_imports)
+from Gene_Tools_Progress import BackgroundJob, cancel_background_jobs
+from Job_Log_Index import JOB_LOG_PATH
 
 class App:
     def __init__(self, root):
@@ -65,13 +42,20 @@ class App:
         self.dest_dir_button1 = ttk.Button(self.tab1, text="Browse", command=self.browse_dest_dir1)
         self.dest_dir_button1.grid(row=1, column=2, padx=5, pady=5)
 
-        # Start button
-        self.start_button1 = ttk.Button(self.tab1, text="Start Process", command=self.start_process1)
-        self.start_button1.grid(row=2, column=1, pady=20)
-        
-        # Status messages
+        # Start and Cancel buttons, the run happens in the background so the window stays usable
+        self.button_frame1 = ttk.Frame(self.tab1)
+        self.button_frame1.grid(row=2, column=1, pady=20)
+        self.start_button1 = ttk.Button(self.button_frame1, text="Start Process", command=self.start_process1)
+        self.start_button1.pack(side='left', padx=5)
+        self.cancel_button1 = ttk.Button(self.button_frame1, text="Cancel", command=self.cancel_process1, state='disabled')
+        self.cancel_button1.pack(side='left', padx=5)
+
+        # Progress bar and status messages
+        self.progress_bar1 = ttk.Progressbar(self.tab1, mode='determinate', length=400)
+        self.progress_bar1.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
         self.status_label1 = ttk.Label(self.tab1, text="", foreground="green")
-        self.status_label1.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
+        self.status_label1.grid(row=4, column=0, columnspan=3, padx=5, pady=5)
+        self.job1 = None
     
     def build_tab2(self):
         # Script 2: Distribute Reference Files
@@ -83,13 +67,27 @@ class App:
         self.dest_base_dir_button2 = ttk.Button(self.tab2, text="Browse", command=self.browse_dest_base_dir2)
         self.dest_base_dir_button2.grid(row=0, column=2, padx=5, pady=5)
 
-        # Start button
-        self.start_button2 = ttk.Button(self.tab2, text="Start Process", command=self.start_process2)
-        self.start_button2.grid(row=1, column=1, pady=20)
-        
-        # Status messages
+        # Delivery mode, hard links share one file with the reference folder so edits show up in both
+        self.delivery_mode_label2 = ttk.Label(self.tab2, text="Delivery mode:")
+        self.delivery_mode_label2.grid(row=1, column=0, padx=5, pady=5, sticky='e')
+        self.delivery_mode_combo2 = ttk.Combobox(self.tab2, values=DELIVERY_MODES, state='readonly', width=12)
+        self.delivery_mode_combo2.set(DEFAULT_DELIVERY_MODE)
+        self.delivery_mode_combo2.grid(row=1, column=1, padx=5, pady=5, sticky='w')
+
+        # Start and Cancel buttons, this tab can run while the other one does
+        self.button_frame2 = ttk.Frame(self.tab2)
+        self.button_frame2.grid(row=2, column=1, pady=20)
+        self.start_button2 = ttk.Button(self.button_frame2, text="Start Process", command=self.start_process2)
+        self.start_button2.pack(side='left', padx=5)
+        self.cancel_button2 = ttk.Button(self.button_frame2, text="Cancel", command=self.cancel_process2, state='disabled')
+        self.cancel_button2.pack(side='left', padx=5)
+
+        # Progress bar and status messages
+        self.progress_bar2 = ttk.Progressbar(self.tab2, mode='determinate', length=400)
+        self.progress_bar2.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
         self.status_label2 = ttk.Label(self.tab2, text="", foreground="green")
-        self.status_label2.grid(row=2, column=0, columnspan=3, padx=5, pady=5)
+        self.status_label2.grid(row=4, column=0, columnspan=3, padx=5, pady=5)
+        self.job2 = None
 
     def browse_source_dir1(self):
         directory = filedialog.askdirectory()
@@ -113,93 +111,79 @@ class App:
         # Get user inputs
         source_dir = self.source_dir_entry1.get()
         dest_dir = self.dest_dir_entry1.get()
-        excel_path = r'Z:\Gene Synthesis\3.0 In-House Gene\3.5 Job Log\3.5 In-house Progress v3.XLSX' # Fixed excel path
+        excel_path = JOB_LOG_PATH # Fixed excel path
         
-        # Run the organizing script
-        self.status_label1.config(text="Organizing files...")
-        self.root.update_idletasks()
-        self.organize_files(source_dir, dest_dir, excel_path)
-        self.status_label1.config(text="Files organized successfully.")
+        # Run the organizing script in the background
+        self.job1 = self.start_job(
+            lambda log, progress, cancel: self.organize_files(source_dir, dest_dir, excel_path, log=log, progress=progress, cancel=cancel),
+            self.start_button1, self.cancel_button1, self.progress_bar1, self.status_label1,
+            "Organizing files...", "Files organized successfully.")
 
     def start_process2(self):
         # Get user inputs
         dest_base_dir = self.dest_base_dir_entry2.get()
+        delivery_mode = self.delivery_mode_combo2.get()
         
-        # Run the distributing script
-        self.status_label2.config(text="Distributing files...")
-        self.root.update_idletasks()
-        self.distribute_files(dest_base_dir)
-        self.status_label2.config(text="Files distributed successfully.")
-
-    def organize_files(self, source_dir, destination_dir, excel_path):
-        if not os.path.exists(source_dir):
-            print(f"Source directory does not exist: {source_dir}")
-            return
-
-        # Delete all .seq files in the source directory
-        for filename in os.listdir(source_dir):
-            file_path = os.path.join(source_dir, filename)
-            if os.path.isfile(file_path) and filename.endswith('.seq'):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Error deleting file {file_path}: {e}")
-
-        # Get the BBID mapping from the Excel file
-        bbid_mapping = get_bbid_mapping(excel_path)
-
-        # Loop through each file in the source directory to organize them
-        for filename in os.listdir(source_dir):
-            file_path = os.path.join(source_dir, filename)
-            if os.path.isfile(file_path) and (filename.endswith('.ab1') or filename.endswith('.fasta')):
-                job_id, plasmid_number = extract_info(filename)
-                if job_id and plasmid_number:
-                    # Get the corresponding BBID or set to empty string if unknown
-                    bbid = bbid_mapping.get(job_id, '')
-                    # Ensure no leading dots and extra dots in the folder name
-                    folder_name = f'{job_id}.{plasmid_number}.{bbid}'.replace('..', '.')
-                    folder_path = os.path.join(destination_dir, folder_name)
-                    # Create the folder if it doesn't exist
-                    if not os.path.exists(folder_path):
-                        os.makedirs(folder_path)
-                    # Move the file to the folder
-                    destination_file = os.path.join(folder_path, filename)
-                    try:
-                        shutil.move(file_path, destination_file)
-                    except Exception as e:
-                        print(f"Error moving file {file_path} to {destination_file}: {e}")
-
-    def distribute_files(self, destination_base_dir):
-        source_dir = r'Z:\Gene Synthesis\3.0 In-House Gene\3.6 QC\3.6.X Reference files'
-        
-        if not os.path.exists(source_dir):
-            print(f"Source directory does not exist: {source_dir}")
-            return
-
-        # Create a dictionary to map base names to a list of full filenames
-        file_map = {}
-        for filename in os.listdir(source_dir):
-            if filename.endswith('.txt'):
-                base_name = filename.split('+')[0].split('.')[0]
-                if base_name not in file_map:
-                    file_map[base_name] = []
-                file_map[base_name].append(filename)
-
-        # Loop through each folder in the destination directory
-        for folder in os.listdir(destination_base_dir):
-            folder_base_name = folder.split('.')[0]  # Assume folder name starts with the base name
-            if folder_base_name in file_map:
-                destination_dir = os.path.join(destination_base_dir, folder)
-                for source_filename in file_map[folder_base_name]:
-                    source_file = os.path.join(source_dir, source_filename)
-                    destination_file = os.path.join(destination_dir, source_filename)
-                    try:
-                        shutil.copy(source_file, destination_file)
-                        print(f"Copied {source_filename} to {folder}")
-                    except Exception as e:
-                        print(f"Error copying file {source_file} to {destination_file}: {e}")
+        # Run the distributing script in the background
+        self.job2 = self.start_job(
+            lambda log, progress, cancel: self.distribute_files(dest_base_dir, delivery_mode, log=log, progress=progress, cancel=cancel),
+            self.start_button2, self.cancel_button2, self.progress_bar2, self.status_label2,
+            "Distributing files...", "Files distributed successfully.")
+
+    def cancel_process1(self):
+        self.cancel_job(self.job1, self.cancel_button1, self.status_label1)
+
+    def cancel_process2(self):
+        self.cancel_job(self.job2, self.cancel_button2, self.status_label2)
+
+    # Function to run an operation as a background job, driving one tab's buttons, progress bar and status
+    def start_job(self, target, start_button, cancel_button, progress_bar, status_label, running_text, done_text):
+        def on_update(text, done, total):
+            progress_bar.config(maximum=max(total, 1), value=done)
+            status_label.config(text=text, foreground="green")
+
+        def on_done(result, error, cancelled):
+            start_button.config(state='normal')
+            cancel_button.config(state='disabled')
+            if error is not None:
+                status_label.config(text=f"Error: {error}", foreground="red")
+            elif cancelled:
+                status_label.config(text=f"Cancelled, {job.done} of {job.total} done.", foreground="red")
+            elif not result:
+                status_label.config(text="Finished with errors, see the console for details.", foreground="red")
+            else:
+                progress_bar.config(value=progress_bar.cget('maximum'))
+                status_label.config(text=done_text, foreground="green")
+
+        start_button.config(state='disabled')
+        cancel_button.config(state='normal')
+        progress_bar.config(value=0)
+        status_label.config(text=running_text, foreground="green")
+        job = BackgroundJob(self.root, target, on_update, on_done)
+        job.start()
+        return job
+
+    def cancel_job(self, job, cancel_button, status_label):
+        if job is not None and job.running():
+            job.cancel()
+            cancel_button.config(state='disabled')
+            status_label.config(text="Cancelling after the current item...", foreground="red")
+
+    def organize_files(self, source_dir, destination_dir, excel_path, max_workers=DEFAULT_IO_WORKERS, log=print, progress=None, cancel=None):
+        return organize_files(source_dir, destination_dir, excel_path, max_workers, log, progress, cancel)
+
+    def distribute_files(self, destination_base_dir, delivery_mode=DEFAULT_DELIVERY_MODE, log=print, progress=None, cancel=None):
+        return distribute_files(destination_base_dir, delivery_mode, log=log, progress=progress, cancel=cancel)
+
+    # Function to close the window, running jobs stop at their next item first
+    def close(self):
+        cancel_background_jobs()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = App(root)
+    root.protocol("WM_DELETE_WINDOW", app.close)
+    # pandas and openpyxl load in the background once the window is drawn
+    root.after_idle(warm_up_imports)
     root.mainloop()
@@ -0,0 +1,172 @@
+import os
+import pickle
+import hashlib
+from Gene_Tools_Trace import span
+
+# Fixed location of the in-house job log shared by all tools
+JOB_LOG_PATH = r'Z:\Gene Synthesis\3.0 In-House Gene\3.5 Job Log\3.5 In-house Progress v3.XLSX'
+JOB_LOG_SHEET = 'WGK - Initiated'
+
+# Local folder holding the parsed indexes, can be overridden with GENE_TOOLS_CACHE_DIR
+CACHE_DIR = os.environ.get('GENE_TOOLS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.gene_tools_cache'))
+
+# Bump when the layout of the cache payload changes
+CACHE_VERSION = 3
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"Missing required columns: {', '.join(missing)}")
+
+
+# Function to get the size and modification time used to detect a changed workbook
+def source_signature(excel_path):
+    stat = os.stat(excel_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# Function to get the cache file for one (workbook, sheet, columns) combination
+def cache_path_for(excel_path, sheet_name, key_column, value_columns, key_as_str=False, keep_last=False):
+    identity = (os.path.abspath(excel_path), sheet_name, key_column, tuple(value_columns))
+    if key_as_str:
+        identity += ('str',)
+    if keep_last:
+        identity += ('last',)
+    identity = repr(identity)
+    digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+    base_name = os.path.splitext(os.path.basename(excel_path))[0]
+    return os.path.join(CACHE_DIR, f"{base_name}-{digest}.pkl")
+
+
+def _read_cache(cache_path, signature):
+    try:
+        with open(cache_path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if payload.get('version') != CACHE_VERSION or payload.get('signature') != signature:
+        return None
+    return payload['mapping'], payload['duplicates']
+
+
+def _write_cache(cache_path, signature, mapping, duplicates):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'signature': signature,
+                         'mapping': mapping, 'duplicates': duplicates}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # A read-only profile only costs us the cache, not the run
+        print(f"Could not write index cache {cache_path}: {e}")
+
+
+def _header_positions(header, columns):
+    header = [str(col).strip() if col is not None else '' for col in header]
+    missing = [col for col in columns if col not in header]
+    if missing:
+        raise MissingColumnsError(missing)
+    return [header.index(col) for col in columns]
+
+
+# Function to stream only the wanted columns of an .xlsx sheet, one row at a time
+def _iter_xlsx_rows(excel_path, sheet_name, columns):
+    import openpyxl
+    workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        rows = sheet.iter_rows(values_only=True)
+        positions = _header_positions(next(rows, ()), columns)
+        for row in rows:
+            yield tuple(row[i] if i < len(row) else None for i in positions)
+    finally:
+        workbook.close()
+
+
+# Function to read only the wanted columns of a legacy .xls sheet
+def _iter_xls_rows(excel_path, sheet_name, columns):
+    import pandas as pd
+    wanted = set(columns)
+    df = pd.read_excel(excel_path, sheet_name=sheet_name, usecols=lambda col: str(col).strip() in wanted)
+    df.columns = [str(col).strip() for col in df.columns]
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+    df = df[list(columns)].astype(object).where(df[list(columns)].notna(), None)
+    return df.itertuples(index=False, name=None)
+
+
+def _build_mapping(excel_path, sheet_name, key_column, value_columns, key_as_str, keep_last):
+    columns = (key_column, *value_columns)
+    if excel_path.lower().endswith('.xls'):
+        rows = _iter_xls_rows(excel_path, sheet_name, columns)
+    else:
+        rows = _iter_xlsx_rows(excel_path, sheet_name, columns)
+
+    # Keep the first (or with keep_last the last) row for a repeated key and count the repeats
+    mapping = {}
+    duplicates = {}
+    for key, *values in rows:
+        if key is None:
+            continue
+        if key_as_str:
+            key = str(key)
+        if key not in mapping:
+            mapping[key] = tuple(values)
+        else:
+            duplicates[key] = duplicates.get(key, 1) + 1
+            if keep_last:
+                mapping[key] = tuple(values)
+    return mapping, duplicates
+
+
+# Indexes already loaded by this process, keyed by cache path: (signature, (mapping, duplicates))
+_memo = {}
+
+
+def load_index_with_duplicates(excel_path, key_column, value_columns, sheet_name=0, key_as_str=False, keep_last=False):
+    """Return ({key: (value, ...)}, {repeated key: row count}) for one sheet.
+
+    Only the requested columns are read: .xlsx sheets are streamed row by row in
+    openpyxl read-only mode and .xls sheets are loaded with usecols. Blank cells
+    come back as None and rows with a blank key are skipped. A key found on more
+    than one row maps to its first row, or its last with keep_last, and is
+    listed in the second dict.
+
+    Both dicts are pickled under CACHE_DIR and reused for as long as the
+    workbook's size and mtime match; within one process they are also kept in
+    memory, so a batch of commands reads the job log once. Raises
+    FileNotFoundError when the workbook is missing and MissingColumnsError when
+    a requested column is absent.
+    """
+    value_columns = tuple(value_columns)
+    signature = source_signature(excel_path)
+    cache_path = cache_path_for(excel_path, sheet_name, key_column, value_columns, key_as_str, keep_last)
+
+    memo = _memo.get(cache_path)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+    cached = _read_cache(cache_path, signature)
+    if cached is None:
+        with span('index.parse', excel_path) as record:
+            cached = _build_mapping(excel_path, sheet_name, key_column, value_columns, key_as_str, keep_last)
+            record['bytes'] = signature[0]
+        _write_cache(cache_path, signature, *cached)
+    _memo[cache_path] = (signature, cached)
+    return cached
+
+
+def load_index(excel_path, key_column, value_columns, sheet_name=0, key_as_str=False, keep_last=False):
+    """Return {key: (value, ...)} for one sheet, see load_index_with_duplicates."""
+    return load_index_with_duplicates(excel_path, key_column, value_columns, sheet_name, key_as_str, keep_last)[0]
+
+
+# Function to get the Job ID -> BBID mapping from the job log
+def load_bbid_mapping(excel_path=JOB_LOG_PATH):
+    # A job listed again further down the log takes the BBID of its last row, as the organizer always did
+    index = load_index(excel_path, 'JOB (WORK) ID', ('BBID',), sheet_name=JOB_LOG_SHEET, keep_last=True)
+    # Jobs without a BBID yet are treated as unknown
+    return {job_id: values[0] for job_id, values in index.items() if values[0] is not None}
@@ -0,0 +1,178 @@
+"""Headless watch mode for the sequencing output folder.
+
+Polls the folder with cheap os.scandir snapshots and sorts each .ab1/.fasta
+file into its job_id.plasmid.bbid folder as soon as its size and mtime have
+stopped changing, using the same naming and BBID lookup as the "Organize
+Sequencing Files" tab, and records it in the catalog. .seq files are deleted
+once they settle, as the tab does. When the optional watchdog package is
+installed, --events wakes the loop on file-system events (inotify on Linux)
+instead of waiting for the next poll.
+
+    python Sequencing_Watcher.py SOURCE_DIR SORTED_DIR [--interval 2] [--settle 5] [--events]
+"""
+import os
+import shutil
+import time
+import argparse
+import threading
+from datetime import datetime
+from Gene_Tools_Catalog import get_catalog
+from Gene_Tools_Core import catalog_sorted_files, get_bbid_mapping, target_folder_name
+from Gene_Tools_Trace import span
+from Job_Log_Index import JOB_LOG_PATH
+
+# Seconds between two snapshots of the source folder
+DEFAULT_INTERVAL = 2.0
+
+# Seconds a file's size and mtime must stay the same before it is treated as complete
+DEFAULT_SETTLE_SECONDS = 5.0
+
+
+def log(message):
+    print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+
+
+class SequencingWatcher:
+    def __init__(self, source_dir, destination_dir, excel_path=JOB_LOG_PATH,
+                 interval=DEFAULT_INTERVAL, settle_seconds=DEFAULT_SETTLE_SECONDS):
+        self.source_dir = source_dir
+        self.destination_dir = destination_dir
+        self.excel_path = excel_path
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        # name -> ((size, mtime), time the signature was first seen)
+        self.pending = {}
+        self.wake_event = threading.Event()
+
+    def snapshot(self):
+        files = {}
+        with os.scandir(self.source_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.ab1', '.fasta', '.seq')) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def poll(self, now=None):
+        """Take one snapshot and return the names that have settled since the last polls."""
+        now = time.monotonic() if now is None else now
+        files = self.snapshot()
+        ready = []
+        for name, signature in files.items():
+            previous = self.pending.get(name)
+            if previous is None or previous[0] != signature:
+                self.pending[name] = (signature, now)
+            elif now - previous[1] >= self.settle_seconds:
+                ready.append(name)
+        # Forget files that were moved or deleted by someone else
+        for name in set(self.pending) - set(files):
+            del self.pending[name]
+        return ready
+
+    def handle(self, names):
+        catalog = get_catalog()
+        bbid_mapping = None
+        job_log_read = False
+        for name in names:
+            file_path = os.path.join(self.source_dir, name)
+            signature, first_seen = self.pending.pop(name)
+            if name.endswith('.seq'):
+                with span('watch.delete', file_path) as record:
+                    try:
+                        os.remove(file_path)
+                        catalog.remove(self.source_dir, [name])
+                    except Exception as e:
+                        record['outcome'] = type(e).__name__
+                        log(f"Error deleting file {file_path}: {e}")
+                continue
+
+            if not job_log_read:
+                # Served from the index cache unless the job log changed since the last batch
+                bbid_mapping = get_bbid_mapping(self.excel_path)
+                job_log_read = True
+            if bbid_mapping is None:
+                # Job log missing or unreadable: tried again at the next poll rather than sorted without a BBID
+                self.pending[name] = (signature, first_seen)
+                continue
+            folder_name = target_folder_name(name, bbid_mapping)
+            if not folder_name:
+                log(f"Skipped {name}: no job ID and plasmid number in the file name")
+                # Left alone until the file changes
+                self.pending[name] = (signature, float('inf'))
+                continue
+            folder_path = os.path.join(self.destination_dir, folder_name)
+            destination_file = os.path.join(folder_path, name)
+            with span('watch.move', file_path) as record:
+                try:
+                    os.makedirs(folder_path, exist_ok=True)
+                    shutil.move(file_path, destination_file)
+                    record['bytes'] = signature[0]
+                    catalog_sorted_files(catalog, self.source_dir, self.destination_dir, folder_name, [name])
+                    catalog.record(folder_path, name, False, size=signature[0], mtime_ns=signature[1])
+                    log(f"Sorted {name} into {folder_name}")
+                except Exception as e:
+                    record['outcome'] = type(e).__name__
+                    log(f"Error moving file {file_path} to {destination_file}: {e}")
+
+    def start_event_wakeups(self):
+        """Wake the loop on file-system events, returns False when watchdog is not installed."""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return False
+
+        wake_event = self.wake_event
+
+        class WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake_event.set()
+
+        observer = Observer()
+        observer.schedule(WakeHandler(), self.source_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return True
+
+    def run(self, stop_event=None):
+        log(f"Watching {self.source_dir} -> {self.destination_dir}")
+        while stop_event is None or not stop_event.is_set():
+            try:
+                ready = self.poll()
+                if ready:
+                    self.handle(ready)
+            except OSError as e:
+                # The share dropping out should not end the watch
+                log(f"Error scanning {self.source_dir}: {e}")
+            # Files still settling need another look even without new events
+            timeout = self.interval if not self.pending else min(self.interval, self.settle_seconds / 2)
+            self.wake_event.wait(timeout)
+            self.wake_event.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sort sequencing files into job folders as they arrive.")
+    parser.add_argument('source_dir', help="Sequencing files directory")
+    parser.add_argument('destination_dir', help="Sorted sequencing folder directory")
+    parser.add_argument('--excel-path', default=JOB_LOG_PATH, help="Job log workbook with the BBIDs")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="Seconds between folder snapshots")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is moved")
+    parser.add_argument('--events', action='store_true',
+                        help="Also wake on file-system events (needs the watchdog package)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source_dir):
+        parser.error(f"Source directory does not exist: {args.source_dir}")
+
+    watcher = SequencingWatcher(args.source_dir, args.destination_dir, args.excel_path, args.interval, args.settle)
+    if args.events and not watcher.start_event_wakeups():
+        log("watchdog is not installed, falling back to polling only")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        log("Stopped")
+
+
+if __name__ == '__main__':
+    main()
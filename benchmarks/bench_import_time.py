@@ -0,0 +1,76 @@
+"""Check the cold-start import time of each launcher against a budget.
+
+Imports every GUI launcher and the CLI in a fresh interpreter with
+`-X importtime`, keeps the fastest of a few runs and fails (exit status 1)
+when a module takes longer than the budget or pulls in a library that should
+only load on first use (pandas, openpyxl).
+
+    python benchmarks/bench_import_time.py [--budget-ms 250] [--runs 3]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAUNCHERS = ('Gene_file_organizer', 'Sequencing_Log_Generator', 'Gene_Report_Organizer', 'Data_Clean_Up', 'Gene_Tools_CLI')
+
+# Libraries the launchers import lazily, seeing one at startup is a regression whatever the timing
+DEFERRED_MODULES = ('pandas', 'openpyxl')
+
+# Milliseconds allowed for importing one launcher, PyQt5 alone takes about 100 ms here
+DEFAULT_BUDGET_MS = 250
+
+
+def import_profile(module):
+    """Return (cumulative microseconds for module, names of every module imported)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            # Header line
+            continue
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            total = int(cumulative)
+    return total, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when a launcher's import time exceeds the budget.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<26} {'import (ms)':>12} {'budget':>8}")
+    for module in LAUNCHERS:
+        timings = []
+        for _ in range(max(1, args.runs)):
+            total, imported = import_profile(module)
+            timings.append(total / 1000)
+            eager = sorted(name for name in DEFERRED_MODULES if name in imported)
+            if eager:
+                failures.append(f"{module} imports {', '.join(eager)} at startup")
+                break
+        best = min(timings)
+        print(f"{module:<26} {best:>12.1f} {args.budget_ms:>8.0f}")
+        if best > args.budget_ms:
+            failures.append(f"{module} took {best:.1f} ms, budget is {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Benchmark the plate parsing step of process_file.
+
+Compares the original approach, reading the whole plate with pandas and
+splitting its folder column cell by cell, against streaming the distinct
+(vector, job) pairs with iter_plate_pairs, on written .xlsx plates. Then
+times a full process_file and compares the peak memory of the two ways of
+reading a plate with many rows but 96 samples.
+
+    python benchmarks/bench_process_file.py [rows ...]
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Keep the tools' caches away from the real ones, must be set before the tools are imported
+BENCH_CACHE_DIR = tempfile.mkdtemp(prefix='gene_tools_bench_cache_')
+os.environ['GENE_TOOLS_CACHE_DIR'] = BENCH_CACHE_DIR
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Gene_Tools_Core import iter_plate_pairs, process_file
+
+
+# Function to build a plate frame with a few leading columns before the '._.' column
+def make_plate(rows):
+    return pd.DataFrame({
+        'Well': [f"{'ABCDEFGH'[i % 8]}{i % 12 + 1}" for i in range(rows)],
+        'Value': range(rows),
+        'Sample': [f"pUC{i % 50}._.J{i // 4:06d}" if i % 10 else None for i in range(rows)],
+    })
+
+
+# Function to build a plate with 96 samples among many rows of other instrument columns
+def make_wide_plate(rows):
+    df = pd.DataFrame({f'Reading {k}': [i * 0.5 if k % 2 else f"t{i % 1000}" for i in range(rows)] for k in range(8)})
+    df.insert(1, 'Sample', [f"pUC{i % 12}._.J{i % 96:06d}" for i in range(rows)])
+    return df
+
+
+# Function to write a plate below the five rows of instrument metadata process_file skips
+def write_plate(df, path):
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, index=False, startrow=5)
+
+
+# The original implementation, read whole and split row by row, kept here as the baseline
+def legacy_pairs(path):
+    df = pd.read_excel(path, skiprows=5)
+    folder_column = None
+    for col in df.columns:
+        if df[col].apply(lambda x: isinstance(x, str) and '._.' in x).any():
+            folder_column = col
+            break
+    pairs = {}
+    for value in df[folder_column]:
+        if isinstance(value, str) and '._.' in value:
+            parts = value.split('._.')
+            if len(parts) >= 2:
+                pairs[(parts[0], parts[1])] = None
+    return list(pairs)
+
+
+def streamed_pairs(path):
+    return list(iter_plate_pairs(path))
+
+
+def best_of(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# Function to get (seconds, peak MB of Python allocations) of one call
+def timed_peak(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        plate_path = os.path.join(tmp, 'plate.xlsx')
+        print(f"{'rows':>8} {'legacy (s)':>12} {'streamed (s)':>13} {'speedup':>8}")
+        for rows in sizes:
+            write_plate(make_plate(rows), plate_path)
+            assert legacy_pairs(plate_path) == streamed_pairs(plate_path)
+            legacy = best_of(legacy_pairs, plate_path)
+            streamed = best_of(streamed_pairs, plate_path)
+            print(f"{rows:>8} {legacy:>12.4f} {streamed:>13.4f} {legacy / streamed:>7.1f}x")
+
+        rows = sizes[0]
+        write_plate(make_plate(rows), plate_path)
+        elapsed = best_of(process_file, plate_path, {}, repeat=1)
+        print(f"process_file on a {rows}-row .xlsx plate: {elapsed:.3f} s")
+
+        # Peak memory of the two ways of reading a plate whose size comes from rows rather than samples
+        write_plate(make_wide_plate(rows), plate_path)
+        whole, whole_peak = timed_peak(lambda path: pd.read_excel(path, skiprows=5), plate_path)
+        streamed, streamed_peak = timed_peak(streamed_pairs, plate_path)
+        print(f"{rows}-row plate with 96 samples, read whole with pandas: {whole:.3f} s, peak {whole_peak:.1f} MB")
+        print(f"{rows}-row plate with 96 samples, streamed pairs:         {streamed:.3f} s, peak {streamed_peak:.1f} MB")
+
+
+if __name__ == '__main__':
+    try:
+        main([int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 200_000])
+    finally:
+        shutil.rmtree(BENCH_CACHE_DIR, ignore_errors=True)
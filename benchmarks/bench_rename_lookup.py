@@ -0,0 +1,79 @@
+"""Benchmark the work-number lookup used by rename_folders.
+
+Times the original per-folder boolean scan of the reference DataFrame
+against the dict index from Job_Log_Index, then runs rename_folders on
+real directories with a cold and a warm index cache.
+
+    python benchmarks/bench_rename_lookup.py [folders] [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_reference(rows):
+    return pd.DataFrame({
+        'Work Number': [f"{240000000 + i}" for i in range(rows)],
+        'BBID': [f"BB{i:06d}" for i in range(rows)],
+        'Vector': [f"pUC{i % 50}" for i in range(rows)],
+    })
+
+
+def write_reference(path, ref_df):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(ref_df.columns))
+    for row in ref_df.itertuples(index=False, name=None):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def main(folders, rows):
+    ref_df = make_reference(rows)
+    # Spread the folders over the whole sheet so the scan cannot stop early
+    work_numbers = [ref_df['Work Number'].iloc[i * rows // folders] for i in range(folders)]
+
+    start = time.perf_counter()
+    for work_number in work_numbers:
+        matching_row = ref_df[ref_df['Work Number'] == work_number]
+        matching_row['BBID'].values[0], matching_row['Vector'].values[0]
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = dict(zip(ref_df['Work Number'], zip(ref_df['BBID'], ref_df['Vector'])))
+    for work_number in work_numbers:
+        index[work_number]
+    lookup = time.perf_counter() - start
+
+    print(f"{folders} folders against {rows} rows")
+    print(f"  DataFrame scan per folder:  {scan:.3f} s")
+    print(f"  dict index (build + look):  {lookup:.3f} s  ({scan / lookup:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['GENE_TOOLS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        import Job_Log_Index
+        from Gene_Tools_Core import rename_folders
+
+        excel_path = os.path.join(tmp, 'reference.xlsx')
+        write_reference(excel_path, ref_df)
+
+        for run in ('cold cache', 'warm cache'):
+            main_folder = os.path.join(tmp, run.replace(' ', '_'))
+            for work_number in work_numbers:
+                os.makedirs(os.path.join(main_folder, f"{work_number}_results"))
+            # Drop the in-process copy so the warm run measures the on-disk cache
+            Job_Log_Index._memo.clear()
+            start = time.perf_counter()
+            rename_folders(main_folder, excel_path, log=lambda message: None)
+            print(f"  rename_folders, {run}:    {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [5_000, 100_000]))
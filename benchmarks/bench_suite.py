@@ -0,0 +1,402 @@
+"""Time every pipeline on synthetic fixtures and write the results as JSON.
+
+Each scale builds its own fixtures in a temporary folder: a 'WGK - Initiated'
+job log, plasmid_job_x.ab1/.seq files, reference .txt files, plate workbooks
+with a '._.' column, a Work Number reference workbook and project folders.
+Destructive operations (organize, zip, unzip, cleanup) get fresh fixtures and
+fixture building is never timed. Index caches are warm unless the benchmark
+name says cold.
+
+    python benchmarks/bench_suite.py [--scales small,medium,large] [--repeat 1]
+                                     [--output results.json] [--compare old.json] [--tolerance 0.25]
+                                     [--min-seconds 0.05]
+
+With --compare, every benchmark present in both files is listed with its
+ratio to the old run, and the exit status is 1 when one is slower than
+(1 + tolerance) times the old time by more than --min-seconds. Use --repeat 3
+or more on shared machines, the fastest run of each benchmark is kept.
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCALES = {
+    'small': {'jobs': 2_000, 'sequencing_files': 500, 'references': 200, 'plates': 5, 'plate_rows': 96,
+              'projects': 20, 'traces': 4},
+    'medium': {'jobs': 20_000, 'sequencing_files': 2_000, 'references': 1_000, 'plates': 20, 'plate_rows': 384,
+               'projects': 100, 'traces': 8},
+    'large': {'jobs': 100_000, 'sequencing_files': 5_000, 'references': 5_000, 'plates': 50, 'plate_rows': 384,
+              'projects': 200, 'traces': 12},
+}
+
+# Size of a synthetic .ab1 trace
+TRACE_BYTES = 120_000
+
+
+def quiet(message):
+    pass
+
+
+# Function to fake a few distinct .ab1 traces, files cycle through them so thousands can be written quickly
+def fake_traces(rng, count=8):
+    traces = []
+    for _ in range(count):
+        channel = bytearray()
+        value = 0
+        while len(channel) < TRACE_BYTES * 15 // 16:
+            value = max(0, min(65535, value + rng.randint(-24, 24)))
+            channel += value.to_bytes(2, 'big')
+        traces.append(b'ABIF' + bytes(124) + bytes(channel) + rng.randbytes(TRACE_BYTES // 16))
+    return traces
+
+
+def job_id(i):
+    return f"J{240000 + i}"
+
+
+def work_number(i):
+    return f"{240000000 + i}"
+
+
+def write_job_log(path, jobs):
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('WGK - Initiated')
+    sheet.append(['JOB (WORK) ID', 'Customer', 'BBID', 'Status'])
+    for i in range(jobs):
+        sheet.append([job_id(i), f"Customer {i % 300}", f"BB{i:06d}" if i % 20 else None, 'Initiated'])
+    workbook.save(path)
+
+
+def write_reference_workbook(path, rows):
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['Work Number', 'BBID', 'Vector'])
+    for i in range(rows):
+        sheet.append([work_number(i), f"BB{i:06d}", f"pUC{i % 50}"])
+    workbook.save(path)
+
+
+def write_plates(folder, plates, rows, jobs):
+    import pandas as pd
+    os.makedirs(folder)
+    for p in range(plates):
+        header = [[f"Plate run {p}", None, None]] + [[None, None, None]] * 4
+        body = [['Well', 'Value', 'Sample']]
+        body += [[f"{'ABCDEFGH'[i % 8]}{i % 12 + 1}", i, f"pUC{i % 50}._.{job_id((p * rows + i) // 4 % jobs)}"]
+                 for i in range(rows)]
+        pd.DataFrame(header + body).to_excel(os.path.join(folder, f"SEQ{p:04d}.xlsx"), index=False, header=False)
+
+
+def write_sequencing_files(folder, count, jobs, traces):
+    os.makedirs(folder)
+    names = []
+    for i in range(count):
+        name = f"P{i % 96}_{job_id(i * 7 % jobs)}_x{i}"
+        with open(os.path.join(folder, f"{name}.ab1"), 'wb') as f:
+            f.write(traces[i % len(traces)])
+        with open(os.path.join(folder, f"{name}.fasta"), 'w') as f:
+            f.write(f">{name}\nACGT\n")
+        with open(os.path.join(folder, f"{name}.seq"), 'w') as f:
+            f.write("ACGT\n")
+        names.append(f"{name}.ab1")
+    return names
+
+
+def write_references(folder, count, sorted_folder, folders):
+    os.makedirs(folder)
+    os.makedirs(sorted_folder)
+    for i in range(count):
+        with open(os.path.join(folder, f"{job_id(i)}+ref.txt"), 'w') as f:
+            f.write("ACGT" * 500)
+    for i in range(folders):
+        os.makedirs(os.path.join(sorted_folder, f"{job_id(i * 3 % count)}.P{i % 96}.BB{i:06d}"))
+
+
+def write_projects(folder, projects, traces_per_project, traces, prefix=''):
+    os.makedirs(folder)
+    for p in range(projects):
+        project = os.path.join(folder, f"{prefix}{work_number(p)}_results")
+        os.makedirs(project)
+        for t in range(traces_per_project):
+            with open(os.path.join(project, f"P{t}_{job_id(p)}_x.ab1"), 'wb') as f:
+                f.write(traces[(p + t) % len(traces)])
+        with open(os.path.join(project, f"{job_id(p)}+ref.txt"), 'w') as f:
+            f.write("ACGT" * 500)
+
+
+def clear_index_caches(cache_dir):
+    import Job_Log_Index
+    import Gene_Tools_Catalog
+    Job_Log_Index._memo.clear()
+    # The catalog lives in the cache folder too, so its connection is closed first
+    for catalog in Gene_Tools_Catalog._catalogs.values():
+        catalog.close()
+    Gene_Tools_Catalog._catalogs.clear()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def run_scale(scale, settings, repeat, tmp):
+    import pandas as pd
+    import Job_Log_Index
+    import Gene_Tools_Core as core
+
+    cache_dir = Job_Log_Index.CACHE_DIR
+    rng = random.Random(0)
+    traces = fake_traces(rng)
+    base = os.path.join(tmp, scale)
+    os.makedirs(base)
+    job_log = os.path.join(base, 'job_log.xlsx')
+    write_job_log(job_log, settings['jobs'])
+    reference_workbook = os.path.join(base, 'reference.xlsx')
+    write_reference_workbook(reference_workbook, settings['jobs'])
+    plates = os.path.join(base, 'plates')
+    write_plates(plates, settings['plates'], settings['plate_rows'], settings['jobs'])
+    bbid_mapping = core.load_bbid_mapping(job_log)
+
+    counter = iter(range(1_000_000))
+
+    def fresh(name):
+        return os.path.join(base, f"{name}-{next(counter)}")
+
+    # Each benchmark is (name, setup returning state, run(state) returning the number of items handled)
+    def setup_names():
+        return [f"P{i % 96}_{job_id(i)}_x{i}.ab1" for i in range(settings['sequencing_files'])]
+
+    def run_extract_info(names):
+        for name in names:
+            core.extract_info(name)
+        return len(names)
+
+    def setup_job_log_cold():
+        clear_index_caches(cache_dir)
+
+    def setup_job_log_warm():
+        core.load_bbid_mapping(job_log)
+        # Only the in-process copy is dropped, the pickled index stays
+        Job_Log_Index._memo.clear()
+
+    def run_job_log(_):
+        return len(core.load_bbid_mapping(job_log))
+
+    def setup_organize():
+        source = fresh('seq')
+        write_sequencing_files(source, settings['sequencing_files'], settings['jobs'], traces)
+        return source, fresh('sorted')
+
+    def run_organize(state):
+        source, destination = state
+        os.makedirs(destination)
+        core.organize_files(source, destination, job_log, log=quiet)
+        return settings['sequencing_files'] * 3
+
+    def setup_distribute():
+        references, sorted_folder = fresh('refs'), fresh('sorted')
+        write_references(references, settings['references'], sorted_folder, settings['sequencing_files'] // 4)
+        # Age the references folder past the mtime tick, or the rerun could never use the cached index
+        old = time.time() - 60
+        os.utime(references, (old, old))
+        clear_index_caches(cache_dir)
+        return references, sorted_folder
+
+    def run_distribute(state):
+        references, sorted_folder = state
+        core.distribute_files(sorted_folder, 'copy', references, log=quiet)
+        return settings['sequencing_files'] // 4
+
+    def setup_distribute_rerun():
+        state = setup_distribute()
+        run_distribute(state)
+        return state
+
+    def setup_plate():
+        return os.path.join(plates, 'SEQ0000.xlsx')
+
+    def run_process_file(plate):
+        core.process_file(plate, bbid_mapping)
+        return settings['plate_rows']
+
+    def run_generate_log(_):
+        success, message = core.generate_sequencing_log(plates, fresh('logs'), job_log, workers=1, log=quiet)
+        if not success:
+            raise RuntimeError(message)
+        return settings['plates']
+
+    def setup_rename():
+        folder = fresh('projects')
+        write_projects(folder, settings['projects'], 0, traces)
+        clear_index_caches(cache_dir)
+        return folder
+
+    def run_rename(folder):
+        core.rename_folders(folder, reference_workbook, log=quiet)
+        return settings['projects']
+
+    def setup_zip():
+        folder = fresh('projects')
+        write_projects(folder, settings['projects'], settings['traces'], traces)
+        return folder
+
+    def run_zip(folder):
+        core.zip_folders(folder, log=quiet)
+        return settings['projects']
+
+    def setup_unzip():
+        folder = setup_zip()
+        run_zip(folder)
+        return folder
+
+    def run_unzip(folder):
+        core.unzip_files(folder, log=quiet)
+        return settings['projects']
+
+    def setup_cleanup():
+        sorted_folder, output = fresh('sorted'), fresh('output')
+        write_projects(sorted_folder, settings['projects'] * 2, 1, traces)
+        os.makedirs(output)
+        # Half of the project folders belong to completed work numbers
+        completed = pd.DataFrame({'Work Number': [work_number(p) for p in range(0, settings['projects'] * 2, 2)]})
+        return sorted_folder, output, completed
+
+    def run_cleanup(state):
+        sorted_folder, output, completed = state
+        record = os.path.join(output, 'cleanup_record.xlsx')
+        core.cleanup_sorted_sequencing(sorted_folder, output, completed, record, log=quiet)
+        return settings['projects'] * 2
+
+    def setup_catalog_cold():
+        folder = fresh('sorted')
+        write_projects(folder, settings['projects'] * 2, 0, traces)
+        # A folder changed within the last mtime tick is always listed again, as a share seen a while later
+        old = time.time() - 60
+        os.utime(folder, (old, old))
+        clear_index_caches(cache_dir)
+        return folder
+
+    def setup_catalog_warm():
+        folder = setup_catalog_cold()
+        run_catalog_list(folder)
+        return folder
+
+    def run_catalog_list(folder):
+        return len(core.get_catalog().list_directory(folder, core.describe_entry))
+
+    benchmarks = [
+        ('extract_info', setup_names, run_extract_info),
+        ('job_log_index_cold', setup_job_log_cold, run_job_log),
+        ('job_log_index_warm', setup_job_log_warm, run_job_log),
+        ('organize_files', setup_organize, run_organize),
+        ('distribute_files', setup_distribute, run_distribute),
+        ('distribute_files_rerun', setup_distribute_rerun, run_distribute),
+        ('process_file', setup_plate, run_process_file),
+        ('generate_sequencing_log', lambda: None, run_generate_log),
+        ('rename_folders_cold', setup_rename, run_rename),
+        ('zip_folders', setup_zip, run_zip),
+        ('unzip_files', setup_unzip, run_unzip),
+        ('cleanup_sorted_sequencing', setup_cleanup, run_cleanup),
+        ('catalog_list_cold', setup_catalog_cold, run_catalog_list),
+        ('catalog_list_warm', setup_catalog_warm, run_catalog_list),
+    ]
+
+    results = []
+    for name, setup, run in benchmarks:
+        timings = []
+        for _ in range(max(1, repeat)):
+            state = setup()
+            # process_file prints per plate, keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                items = run(state)
+                timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        results.append({'scale': scale, 'benchmark': name, 'seconds': round(seconds, 6), 'items': items,
+                        'items_per_second': round(items / seconds, 1) if seconds > 0 else None})
+        print(f"{scale:<7} {name:<27} {seconds:>9.3f} s {items:>8} items")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance, min_seconds):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['scale'], r['benchmark']): r['seconds'] for r in json.load(f)['results']}
+    regressions = []
+    print(f"\n{'scale':<7} {'benchmark':<27} {'old (s)':>9} {'new (s)':>9} {'ratio':>6}")
+    for result in results:
+        old = baseline.get((result['scale'], result['benchmark']))
+        if not old:
+            continue
+        ratio = result['seconds'] / old
+        # Differences this small are timer noise, whatever the ratio
+        flag = '  SLOWER' if ratio > 1 + tolerance and result['seconds'] - old > min_seconds else ''
+        print(f"{result['scale']:<7} {result['benchmark']:<27} {old:>9.3f} {result['seconds']:>9.3f} {ratio:>6.2f}{flag}")
+        if flag:
+            regressions.append(result['benchmark'])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline on synthetic fixtures.")
+    parser.add_argument('--scales', default='small,medium,large', help="Comma separated: " + ', '.join(SCALES))
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per benchmark, the fastest is kept")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file the results are written to")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before a benchmark fails")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="Slowdowns smaller than this many seconds are never reported")
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scale(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the index caches away from the real ones, must be set before the tools are imported
+        os.environ['GENE_TOOLS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        results = []
+        for scale in scales:
+            results.extend(run_scale(scale, SCALES[scale], args.repeat, tmp))
+
+    report = {
+        'revision': git_revision(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'scales': {scale: SCALES[scale] for scale in scales},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"FAIL: slower than {1 + args.tolerance:.2f}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark archive size against wall time for each compression preset.
+
+Builds a synthetic project tree (.ab1 traces, .fasta/.txt references and a
+few already-compressed files) and zips it with every entry of
+COMPRESSION_PRESETS through zip_folders.
+
+    python benchmarks/bench_zip_compression.py [projects] [traces per project]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+# Keep the catalog and journals zip_folders writes away from the real ones, must be set before the tools are imported
+BENCH_CACHE_DIR = tempfile.mkdtemp(prefix='gene_tools_bench_cache_')
+os.environ['GENE_TOOLS_CACHE_DIR'] = BENCH_CACHE_DIR
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Gene_Tools_Catalog import get_catalog
+from Gene_Tools_Core import COMPRESSION_PRESETS, zip_folders
+
+
+# Function to fake an .ab1 trace: a header, smooth-ish 16-bit channel data and a random tail
+def fake_ab1(rng, size=250_000):
+    header = b'ABIF' + bytes(124)
+    channel = bytearray()
+    value = 0
+    while len(channel) < size * 15 // 16:
+        value = max(0, min(65535, value + rng.randint(-24, 24)))
+        channel += value.to_bytes(2, 'big')
+    return header + bytes(channel) + rng.randbytes(size // 16)
+
+
+def fake_sequence(rng, length=6_000):
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+
+def build_tree(base_dir, projects, traces, rng):
+    total = 0
+    for p in range(projects):
+        folder = os.path.join(base_dir, f"J{240000 + p}.P{p}.BB{p:05d}")
+        os.makedirs(folder)
+        files = {f"P{p}_J{240000 + p}_{t:02d}.ab1": fake_ab1(rng) for t in range(traces)}
+        sequence = fake_sequence(rng)
+        files[f"J{240000 + p}.fasta"] = f">J{240000 + p}\n{sequence}\n".encode()
+        files[f"J{240000 + p}+ref.txt"] = sequence.encode()
+        files['report.pdf.gz'] = zlib.compress(rng.randbytes(50_000))
+        for name, content in files.items():
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(content)
+            total += len(content)
+    return total
+
+
+def main(projects, traces):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, 'template')
+        os.makedirs(template)
+        total = build_tree(template, projects, traces, rng)
+        print(f"{projects} projects, {total / 1e6:.1f} MB")
+        print(f"{'preset':<16} {'archives (MB)':>14} {'ratio':>6} {'wall (s)':>9}")
+
+        for preset, policy in COMPRESSION_PRESETS.items():
+            work_dir = os.path.join(tmp, preset.replace(' ', '_'))
+            shutil.copytree(template, work_dir)
+            start = time.perf_counter()
+            zip_folders(work_dir, compression_policy=policy, log=lambda message: None)
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(work_dir, name)) for name in os.listdir(work_dir))
+            print(f"{preset:<16} {size / 1e6:>14.1f} {size / total:>6.2f} {elapsed:>9.2f}")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    try:
+        main(*(args or [20, 12]))
+    finally:
+        get_catalog().close()
+        shutil.rmtree(BENCH_CACHE_DIR, ignore_errors=True)
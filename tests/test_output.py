@@ -0,0 +1,44 @@
+"""Tests for the streaming workbook writer.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Gene_Tools_Output import TableWriter, sidecar_path
+
+
+class SidecarTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='gene_tools_test_output_')
+        self.path = os.path.join(self.directory, 'log.xlsx')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, rows, sidecars=()):
+        with TableWriter(self.path, log=lambda message: None) as writer:
+            sheet = writer.sheet('Log', ['Name'], sidecars=sidecars)
+            for row in rows:
+                sheet.append(row)
+
+    def test_sidecar_not_written_again_is_removed(self):
+        self.write([['old']], sidecars=('csv',))
+        self.assertTrue(os.path.exists(sidecar_path(self.path, 'csv')))
+        self.write([['new']])
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(sidecar_path(self.path, 'csv')))
+
+    def test_sidecar_written_again_is_replaced(self):
+        self.write([['old']], sidecars=('csv',))
+        self.write([['new']], sidecars=('csv',))
+        with open(sidecar_path(self.path, 'csv'), encoding='utf-8') as f:
+            self.assertEqual(f.read().split(), ['Name', 'new'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Resume tests for the journaled bulk operations.
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from zipfile import ZipFile
+
+# Keep the catalog and journals the operations write away from the real ones, must be set before the tools are imported
+TEST_CACHE_DIR = tempfile.mkdtemp(prefix='gene_tools_test_cache_')
+os.environ['GENE_TOOLS_CACHE_DIR'] = TEST_CACHE_DIR
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Gene_Tools_Core
+from Gene_Tools_Catalog import get_catalog
+from Gene_Tools_Journal import Journal
+
+
+def tearDownModule():
+    get_catalog().close()
+    shutil.rmtree(TEST_CACHE_DIR, ignore_errors=True)
+
+
+class Interrupted(BaseException):
+    """Stands in for the process being killed: not caught by the operations' error handling."""
+
+
+class JournalTest(unittest.TestCase):
+    def test_completion_after_a_torn_line_is_kept(self):
+        journal = Journal('test', TEST_CACHE_DIR)
+        journal.plan(['a', 'b', 'c'])
+        journal.done(0)
+        journal.file.write('{"done": 1')
+        journal.file.close()
+
+        resumed = Journal('test', TEST_CACHE_DIR)
+        self.assertEqual(resumed.load(), (['a', 'b', 'c'], {0: None}))
+        resumed.done(1)
+        resumed.file.close()
+        reloaded = Journal('test', TEST_CACHE_DIR)
+        self.assertEqual(reloaded.load()[1], {0: None, 1: None})
+        reloaded.finish()
+
+
+class ZipResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='gene_tools_test_zip_')
+        self.folder = os.path.join(self.directory, 'P1_Project')
+        os.makedirs(self.folder)
+        for i in range(5):
+            with open(os.path.join(self.folder, f"trace_{i}.ab1"), 'wb') as f:
+                f.write(os.urandom(1000))
+        # An archive of the same name already there when the run is planned
+        with ZipFile(f"{self.folder}.zip", 'w') as zipf:
+            zipf.writestr('old.txt', 'old')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_interrupted_removal_keeps_the_verified_archive(self):
+        real_rmtree = shutil.rmtree
+
+        # Remove 3 of the 5 files, then die before the folder is gone
+        def interrupted_rmtree(path, *args, **kwargs):
+            for name in sorted(os.listdir(path))[:3]:
+                os.remove(os.path.join(path, name))
+            raise Interrupted()
+
+        with mock.patch.object(Gene_Tools_Core.shutil, 'rmtree', interrupted_rmtree):
+            with self.assertRaises(Interrupted):
+                Gene_Tools_Core.zip_folders(self.directory, max_workers=1, log=lambda message: None)
+        self.assertEqual(len(os.listdir(self.folder)), 2)
+
+        with mock.patch.object(Gene_Tools_Core.shutil, 'rmtree', real_rmtree):
+            self.assertTrue(Gene_Tools_Core.zip_folders(self.directory, max_workers=1, log=lambda message: None))
+
+        self.assertFalse(os.path.exists(self.folder))
+        with ZipFile(f"{self.folder}.zip") as zipf:
+            self.assertEqual(sorted(zipf.namelist()), [f"trace_{i}.ab1" for i in range(5)])
+        self.assertFalse(os.path.exists(Journal('zip', self.directory).path))
+
+
+if __name__ == '__main__':
+    unittest.main()